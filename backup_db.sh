@@ -1,10 +1,11 @@
 #!/bin/bash
 # Script to backup database for Gear Calc
+# Uses SQLite's online backup inside the running container, so the app keeps serving
 
 set -o xtrace
+set -o errexit
 
-docker container stop gear-calc
-sleep 5
-rm -vf /home/pi/dataspace/backup/gear_calc.db
-cp /home/pi/code/container_data/gear_calc.db /home/pi/dataspace/backup/gear_calc.db
-docker container start gear-calc
+docker exec gear-calc python db_backup.py --output /app/data/backup/gear_calc.db
+mkdir -p /home/pi/dataspace/backup
+cp /home/pi/code/container_data/backup/gear_calc.db /home/pi/dataspace/backup/gear_calc.db.tmp
+mv -f /home/pi/dataspace/backup/gear_calc.db.tmp /home/pi/dataspace/backup/gear_calc.db
@@ -0,0 +1,176 @@
+"""Offline batch calculation of gear tables across all CPU cores.
+
+Reads chainring/cassette combinations from a file (CSV with front and rear
+columns, or JSON/JSON Lines with front and rear lists; optional id and name) or
+from every saved configuration, calculates their gear tables in chunks on a
+process pool, and streams the results in input order as NDJSON (one line
+per combination) or CSV (one row per gear). Only a few chunks are in flight
+at a time, so memory stays flat however large the input is.
+
+Usage:
+    python batch_calc.py combinations.csv --output report.ndjson
+    python batch_calc.py --from-db --format csv --output fleet.csv
+    python batch_calc.py - --format csv --min-ratio 0.9 --max-ratio 3.5 < combinations.jsonl
+"""
+
+import argparse
+import collections
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import business_logic
+import component_io
+import database_manager
+import gear_engine
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+CSV_FIELDS = ("id", "name", "front_tooth", "gear_num", "rear_tooth", "ratio", "change_pct", "status", "total_range")
+DEFAULT_CHUNK_SIZE = 500
+
+def read_combinations(stream, fmt):
+    """
+    Yield (id, name, front teeth, rear teeth) from a text stream in component_io's csv or jsonl format.
+    Rows with invalid teeth are logged and skipped.
+    """
+    for line_no, row in enumerate(component_io.read_components(stream, fmt), start=1):
+        if not isinstance(row, dict):
+            logger.warning(f"Skipping row {line_no}: {row if isinstance(row, ValueError) else 'not an object'}")
+            continue
+        try:
+            front = business_logic.validate_teeth(row.get("front") or "")
+            rear = business_logic.validate_teeth(row.get("rear") or "")
+        except (AttributeError, ValueError) as e:
+            logger.warning(f"Skipping row {line_no}: {e}")
+            continue
+        yield row.get("id") or str(line_no), row.get("name") or "", front, rear
+
+def iter_database_combinations(batch_size=DEFAULT_CHUNK_SIZE):
+    """Yield (id, name, front teeth, rear teeth) for every saved configuration, in keyset batches."""
+    for batch in business_logic.iter_configuration_rows(batch_size):
+        for row in batch:
+            yield row["id"], row["name"], row["front_teeth"], row["rear_teeth"]
+
+def calculate_chunk(rows, preferences, fmt):
+    """Calculate one chunk of combinations and return it serialized. Runs in the worker processes."""
+    tables = business_logic.calculate_gear_ratios_batch([(front, rear) for _, _, front, rear in rows], preferences)
+
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps({
+                "id": row_id, "name": name, "front": front, "rear": rear,
+                "tables": gear_engine.tables_to_dicts(pair_tables)
+            }) + "\n"
+            for (row_id, name, front, rear), pair_tables in zip(rows, tables)
+        )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for (row_id, name, _, _), pair_tables in zip(rows, tables):
+        for table in pair_tables:
+            for gear_num, rear_tooth, ratio, change_pct, status in table.rows():
+                writer.writerow((
+                    row_id, name, table.front_tooth, gear_num, rear_tooth,
+                    ratio, "" if change_pct is None else change_pct,
+                    status, table.total_range
+                ))
+    return buffer.getvalue()
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_batch(combinations, output, fmt="ndjson", preferences=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Calculate every combination and write the results to output in input order.
+    With more than one worker, chunks run on a process pool with at most two chunks per
+    worker in flight; with one worker they run inline. Returns the number of combinations.
+    """
+    workers = workers or os.cpu_count() or 1
+    if fmt == "csv":
+        output.write(",".join(CSV_FIELDS) + "\r\n")
+
+    count = 0
+    if workers == 1:
+        for chunk in _chunks(combinations, chunk_size):
+            output.write(calculate_chunk(chunk, preferences, fmt))
+            count += len(chunk)
+        return count
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for chunk in _chunks(combinations, chunk_size):
+            if len(pending) >= workers * 2:
+                output.write(pending.popleft().result())
+            pending.append(pool.submit(calculate_chunk, chunk, preferences, fmt))
+            count += len(chunk)
+        while pending:
+            output.write(pending.popleft().result())
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate gear tables for many chainring/cassette combinations.")
+    parser.add_argument("path", nargs="?", help="Input file (csv or jsonl), or - for stdin")
+    parser.add_argument("--from-db", action="store_true", help="Calculate every saved configuration instead of a file")
+    parser.add_argument("--input-format", choices=component_io.FORMATS, help="Defaults to the file extension, or csv")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson", help="Output format (default: %(default)s)")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Combinations per worker task (default: %(default)s)")
+    parser.add_argument("--min-ratio", type=float, help="Preferred minimum ratio for status colouring")
+    parser.add_argument("--max-ratio", type=float, help="Preferred maximum ratio for status colouring")
+    args = parser.parse_args(argv)
+
+    if bool(args.path) == args.from_db:
+        parser.error("give either an input file or --from-db")
+    if (args.min_ratio is None) != (args.max_ratio is None):
+        parser.error("--min-ratio and --max-ratio go together")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+
+    preferences = None
+    if args.min_ratio is not None:
+        preferences = types.SimpleNamespace(min_ratio=args.min_ratio, max_ratio=args.max_ratio)
+
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    started = time.perf_counter()
+    try:
+        if args.from_db:
+            database_manager.initialize_db()
+            with database_manager.connection():
+                if preferences is None:
+                    saved = database_manager.get_user_preferences()
+                    preferences = types.SimpleNamespace(min_ratio=saved.min_ratio, max_ratio=saved.max_ratio)
+                count = run_batch(iter_database_combinations(args.chunk_size), output, args.format,
+                                  preferences, args.workers, args.chunk_size)
+        else:
+            fmt = args.input_format or component_io.detect_format(args.path)
+            stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+            with stream:
+                count = run_batch(read_combinations(stream, fmt), output, args.format,
+                                  preferences, args.workers, args.chunk_size)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Calculated {count} combination(s) in {elapsed:.2f} s ({count / elapsed if elapsed else 0:.0f}/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
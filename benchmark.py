@@ -0,0 +1,263 @@
+"""Benchmarks for the calculation and page-rendering hot paths.
+
+Builds synthetic databases with a fixed random seed, times the core
+functions and routes against each, and optionally compares the medians with
+the stored baseline (benchmark_baseline.json).
+
+Usage:
+    python benchmark.py                              # 100, 10k and 100k configurations
+    python benchmark.py --sizes 100,10000 --repeat 10
+    python benchmark.py --save-baseline              # store results as the new baseline
+    python benchmark.py --compare                    # exit 1 if any median is >20% slower than baseline
+    python benchmark.py --compare --threshold 0.25
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+import business_logic
+import database_manager
+from database_model import db, GearConfiguration
+from utils import generate_uuid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.2
+SEED = 42
+
+def build_database(path, configurations, seed=SEED):
+    """Create a synthetic database at path with the given number of configurations."""
+    rng = random.Random(seed)
+    database_manager.DATABASE_PATH = path
+    database_manager.initialize_db()
+
+    # The component library grows with the number of configurations, like a real catalogue would
+    chainring_count = max(4, configurations // 500)
+    cassette_count = max(8, configurations // 100)
+    chainrings = [{
+        "name": f"Chainring {i}",
+        "type": "Chainring",
+        "teeth": sorted(rng.sample(range(26, 54), rng.choice([1, 2, 3])), reverse=True),
+        "speed": None
+    } for i in range(chainring_count)]
+    cassettes = []
+    for i in range(cassette_count):
+        speed = rng.choice([9, 10, 11, 12, 13])
+        teeth = sorted(rng.sample(range(9, 52), speed))
+        cassettes.append({"name": f"Cassette {i}", "type": "Cassette", "teeth": teeth, "speed": speed})
+
+    with database_manager.connection():
+        database_manager.add_components_bulk(chainrings + cassettes)
+        front_ids = [c.id for c in database_manager.get_components(type="Chainring")]
+        rear_ids = [c.id for c in database_manager.get_components(type="Cassette")]
+
+        created_at = datetime.datetime(2024, 1, 1)
+        rows = [{
+            "id": generate_uuid(),
+            "name": f"Configuration {i}",
+            "front_component_id": rng.choice(front_ids),
+            "rear_component_id": rng.choice(rear_ids),
+            "created_at": created_at + datetime.timedelta(minutes=i)
+        } for i in range(configurations)]
+        with db.atomic():
+            for start in range(0, len(rows), 100):
+                GearConfiguration.insert_many(rows[start:start + 100]).execute()
+        business_logic.refresh_configuration_ranges(only_missing=True)
+
+    business_logic.invalidate_component_options()
+    business_logic.invalidate_gear_tables()
+
+def _time(func, repeat, number=1):
+    """Run func number times per sample, repeat samples. Returns per-call timings in milliseconds."""
+    func()  # warm up caches and connections
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) * 1000 / number)
+    return samples
+
+async def _request(app, method, path, form=None):
+    """Send one request straight to the ASGI app and return the status code."""
+    path, _, query = path.partition("?")
+    body = urlencode(form).encode() if form else b""
+    headers = [(b"host", b"benchmark")]
+    if form:
+        headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = {}
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status.get("code")
+
+async def _time_route(app, method, path, repeat, form=None):
+    status = await _request(app, method, path, form)
+    if status != 200:
+        raise RuntimeError(f"{method} {path} returned {status}")
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await _request(app, method, path, form)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def run_size(size, repeat, workdir):
+    """Run every benchmark against a fresh database with size configurations."""
+    from main import app
+
+    build_database(os.path.join(workdir, f"bench_{size}.db"), size)
+    results = {}
+
+    with database_manager.connection():
+        config = GearConfiguration.select().order_by(GearConfiguration.id).first()
+        front = config.front_component_id
+        rear = config.rear_component_id
+        preferences = database_manager.get_user_preferences()
+
+        results["calculate_gear_ratios"] = _time(
+            lambda: business_logic.calculate_gear_ratios(front.teeth, rear.teeth, preferences), repeat, number=200
+        )
+        results["calculate_total_range_value"] = _time(
+            lambda: business_logic.calculate_total_range_value(front.teeth, rear.teeth), repeat, number=2000
+        )
+        results["get_landing_page_data"] = _time(business_logic.get_landing_page_data, repeat)
+
+    async def routes():
+        return {
+            "GET /": await _time_route(app, "GET", "/", repeat),
+            "GET /calculator/{id}": await _time_route(app, "GET", f"/calculator/{config.id}", repeat),
+            "POST /calculate-preview": await _time_route(app, "POST", "/calculate-preview", repeat, form={
+                "front_component_id": front.id,
+                "rear_component_id": rear.id
+            }),
+        }
+
+    results.update(asyncio.run(routes()))
+    database_manager.close_db()
+
+    return {f"{size}/{name}": _summarize(samples) for name, samples in results.items()}
+
+def _summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "max_ms": round(max(samples), 4),
+        "samples": len(samples)
+    }
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline ms, current ms, change) for every benchmark slower than threshold."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("benchmarks", {}).get(name)
+        if not reference or not reference["median_ms"]:
+            continue
+        change = result["median_ms"] / reference["median_ms"] - 1
+        if change > threshold:
+            regressions.append((name, reference["median_ms"], result["median_ms"], change))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Gear Calc hot paths.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated configuration counts (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed samples per benchmark (default: %(default)s)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--compare", action="store_true",
+                        help="Compare with the baseline file and exit with status 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown versus baseline as a fraction, with --compare (default: %(default)s)")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    if args.compare and args.save_baseline:
+        parser.error("--compare and --save-baseline cannot be combined")
+
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            parser.error(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"Benchmarking {size} configurations...", file=sys.stderr)
+            results.update(run_size(size, args.repeat, workdir))
+
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        print(f"{name:<{width}}  median {result['median_ms']:>10.4f} ms  min {result['min_ms']:>10.4f} ms")
+
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "benchmarks": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        return 0
+
+    missing = [name for name in results if name not in baseline.get("benchmarks", {})]
+    if missing:
+        print(f"Not in baseline, not compared: {', '.join(missing)}")
+    regressions = compare(results, baseline, args.threshold)
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: {before:.4f} ms -> {after:.4f} ms (+{change:.0%})")
+    if regressions:
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%} of baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,115 @@
 import database_manager
+import gear_engine
+from cache import LRUCache
+from ratio_index import RatioIndex
+from utils import encode_cursor, decode_cursor
+import datetime
 import json
 import logging
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Gear tables keyed by (front teeth, rear teeth, min ratio, max ratio). Like the metrics tables below,
+# saving a component or the preferences changes the key rather than the entry, so nothing is invalidated.
+gear_table_cache = LRUCache("gear_tables", maxsize=int(os.getenv("GEAR_TABLE_CACHE_SIZE", "512")))
+
+# Metrics tables keyed by (front teeth, rear teeth, wheel circumference, crank length, cadences).
+# Every input is part of the key, so entries never go stale and are not invalidated.
+gear_metrics_cache = LRUCache("gear_metrics", maxsize=int(os.getenv("GEAR_METRICS_CACHE_SIZE", "512")))
+MAX_CADENCES = 20
+
+# Every chainring x cog ratio in the library, built on first lookup and updated as components change
+gear_ratio_index = RatioIndex()
+
+# Listing pages
+PAGE_SIZE = 48
+MAX_PAGE_SIZE = 500
+CONFIGURATION_SORTS = ("created", "name", "range")
+
+# Dropdown options per component type, rebuilt only after the component library changes
+_component_options = {}
+_component_options_generation = 0
+_component_options_lock = threading.Lock()
+
 def calculate_gear_ratios(front_teeth, rear_teeth, preferences=None):
     """
     Calculate gear ratios for given front and rear teeth.
-    Returns a list of dictionaries, one for each front chainring.
+    Returns a list of gear_engine.GearTable, one for each front chainring.
     """
-    results = []
-    
-    sorted_rear = sorted(rear_teeth, reverse=True)
-    
-    for front in front_teeth:
-        gears = []
-        prev_ratio = 0
-        
-        for i, rear in enumerate(sorted_rear):
-            ratio = round(front / rear, 3)
-            
-            change_pct = 0
-            if prev_ratio > 0:
-                change_pct = round(((ratio - prev_ratio) / prev_ratio) * 100, 1)
-            
-            # Determine status based on preferences
-            status = "normal"
-            if preferences:
-                min_r = preferences.min_ratio
-                max_r = preferences.max_ratio
-                range_span = max_r - min_r
-                warning_buffer = range_span * 0.1 # 10% buffer
-                
-                if ratio < min_r or ratio > max_r:
-                    status = "poor"
-                elif (ratio < min_r + warning_buffer) or (ratio > max_r - warning_buffer):
-                    status = "warning"
-                else:
-                    status = "optimal"
-
-            gears.append({
-                "rear_tooth": rear,
-                "ratio": ratio,
-                "gear_num": i + 1,
-                "change_pct": change_pct if i > 0 else None,
-                "status": status
-            })
-            prev_ratio = ratio
-            
-        # Calculate total range
-        if gears:
-            min_ratio = gears[0]["ratio"]
-            max_ratio = gears[-1]["ratio"]
-            total_range = calculate_total_range_value([front], rear_teeth)
-        else:
-            total_range = 0
-        
-        results.append({
-            "front_tooth": front,
-            "total_range": total_range,
-            "gears": gears
-        })
-    
+    return gear_engine.calculate_gear_tables(front_teeth, rear_teeth, preferences)
+
+def calculate_gear_ratios_batch(pairs, preferences=None):
+    """
+    Calculate gear ratios for many (front_teeth, rear_teeth) pairs in one vectorized pass.
+    Returns one calculate_gear_ratios result per pair, in input order.
+    """
+    return gear_engine.calculate_gear_tables_batch(pairs, preferences)
+
+def get_cached_gear_ratios(front_teeth, rear_teeth, preferences=None):
+    """
+    Same as calculate_gear_ratios, but memoized in gear_table_cache.
+    The returned tables are shared between callers and must not be modified.
+    """
+    key = (
+        tuple(front_teeth),
+        tuple(rear_teeth),
+        preferences.min_ratio if preferences else None,
+        preferences.max_ratio if preferences else None
+    )
+    return gear_table_cache.get_or_compute(
+        key, lambda: calculate_gear_ratios(front_teeth, rear_teeth, preferences)
+    )
+
+def _metrics_parameters(circumference_mm, crank_length_mm, cadences):
+    """Validate metrics inputs and return them in hashable form."""
+    if circumference_mm is None:
+        circumference_mm = gear_engine.DEFAULT_WHEEL_CIRCUMFERENCE_MM
+    if crank_length_mm is None:
+        crank_length_mm = gear_engine.DEFAULT_CRANK_LENGTH_MM
+    cadences = tuple(cadences) if cadences else gear_engine.DEFAULT_CADENCES
+    if not 500 <= circumference_mm <= 3500:
+        raise ValueError("Wheel circumference must be between 500 and 3500 mm.")
+    if not 100 <= crank_length_mm <= 250:
+        raise ValueError("Crank length must be between 100 and 250 mm.")
+    if len(cadences) > MAX_CADENCES:
+        raise ValueError(f"At most {MAX_CADENCES} cadences can be requested.")
+    if any(not 0 < c <= 250 for c in cadences):
+        raise ValueError("Cadences must be between 1 and 250 rpm.")
+    return float(circumference_mm), float(crank_length_mm), tuple(float(c) for c in cadences)
+
+def calculate_gear_metrics_batch(pairs, circumference_mm=None, crank_length_mm=None, cadences=None):
+    """
+    Development, gain ratio and speed-at-cadence tables for many (front_teeth, rear_teeth) pairs.
+    Cached pairs come from gear_metrics_cache; all misses are computed together in one vectorized pass.
+    Returns one list of chainring tables per pair, in input order. The tables are shared and must not be modified.
+    """
+    parameters = _metrics_parameters(circumference_mm, crank_length_mm, cadences)
+    keys = [(tuple(front), tuple(rear)) + parameters for front, rear in pairs]
+
+    sentinel = object()
+    results = [gear_metrics_cache.get(key, sentinel) for key in keys]
+    missing = {}
+    for i, result in enumerate(results):
+        if result is sentinel:
+            missing.setdefault(keys[i], []).append(i)
+
+    if missing:
+        computed = gear_engine.calculate_gear_metrics_batch(
+            [(key[0], key[1]) for key in missing], *parameters
+        )
+        for (key, positions), tables in zip(missing.items(), computed):
+            gear_metrics_cache.put(key, tables)
+            for i in positions:
+                results[i] = tables
+
     return results
 
+def invalidate_gear_tables():
+    """Drop every cached gear table, e.g. to time calculations from a cold cache."""
+    gear_table_cache.clear()
+
 def parse_teeth(teeth_val):
     """
     Parse teeth input into a list of integers.
@@ -99,12 +145,11 @@ def calculate_total_range_value(front_teeth, rear_teeth):
     """
     if not front_teeth or not rear_teeth:
         return 0
-        
-    max_front = max(front_teeth)
-    min_front = min(front_teeth)
-    max_rear = max(rear_teeth)
-    min_rear = min(rear_teeth)
-    
+
+    return calculate_total_range_from_stats(min(front_teeth), max(front_teeth), min(rear_teeth), max(rear_teeth))
+
+def calculate_total_range_from_stats(min_front, max_front, min_rear, max_rear):
+    """Total gear range percentage from the smallest/largest teeth, as in calculate_total_range_value."""
     if min_rear == 0 or max_rear == 0:
         return 0
         
@@ -117,20 +162,39 @@ def calculate_total_range_value(front_teeth, rear_teeth):
     return round((max_ratio / min_ratio) * 100)
 
 
-def get_landing_page_data():
-    """Get data for the landing page (list of configurations)."""
-    configs = database_manager.get_configurations()
+def get_landing_page_data(limit=PAGE_SIZE, after=None, sort="created", order="desc", search=None,
+                          component_id=None, min_range=None, max_range=None):
+    """
+    Get one page of configurations for the landing page.
+    Returns a dict with the configuration rows and the cursor of the next page (None on the last page).
+    Raises ValueError for an unknown sort/order or a malformed cursor.
+    """
+    if sort not in CONFIGURATION_SORTS:
+        raise ValueError(f"Sort must be one of {', '.join(CONFIGURATION_SORTS)}.")
+    if order not in ("asc", "desc"):
+        raise ValueError("Order must be asc or desc.")
+
+    configs, has_more = database_manager.get_configurations_page(
+        _page_size(limit),
+        sort=sort,
+        descending=(order == "desc"),
+        after=_decode_configuration_cursor(after, sort) if after else None,
+        search=search,
+        component_id=component_id,
+        min_range=min_range,
+        max_range=max_range
+    )
+
     data = []
     for config in configs:
         try:
             front = config.front_component_id
             rear = config.rear_component_id
-            
-            front_teeth = parse_teeth(front.teeth)
-            rear_teeth = parse_teeth(rear.teeth)
-            
-            total_range = calculate_total_range_value(front_teeth, rear_teeth)
-            
+
+            total_range = config.total_range
+            if total_range is None:
+                total_range = _component_pair_range(front, rear)
+
             data.append({
                 "id": config.id,
                 "name": config.name,
@@ -143,32 +207,197 @@ def get_landing_page_data():
         except Exception as e:
             logger.warning(f"Skipping config {config.id} due to error: {e}")
             continue
-            
-    return data
+
+    next_cursor = None
+    if has_more and configs:
+        last = configs[-1]
+        next_cursor = encode_cursor(sort, _configuration_sort_value(last, sort), last.id)
+
+    return {"configs": data, "next_cursor": next_cursor}
+
+def _page_size(limit):
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+def _configuration_sort_value(config, sort):
+    if sort == "created":
+        return config.created_at.isoformat()
+    if sort == "range":
+        return config.total_range or 0
+    return config.name
+
+# JSON type of the sort value in a page cursor, for each sort
+_CURSOR_VALUE_TYPES = {"created": str, "name": str, "range": int}
+
+def _decode_page_cursor(cursor, sort):
+    """
+    Turn a cursor from encode_cursor(sort, value, id) back into the (sort value, id) pair.
+    Raises ValueError unless it has exactly those three values, of the types this sort produces.
+    """
+    values = decode_cursor(cursor)
+    if len(values) != 3:
+        raise ValueError("Invalid page cursor.")
+    cursor_sort, value, last_id = values
+    if cursor_sort != sort:
+        raise ValueError("Page cursor does not match the requested sort.")
+    if not isinstance(value, _CURSOR_VALUE_TYPES[sort]) or isinstance(value, bool) or not isinstance(last_id, str):
+        raise ValueError("Invalid page cursor.")
+    return value, last_id
+
+def _decode_configuration_cursor(cursor, sort):
+    """Turn a cursor back into the (sort value, id) pair the database layer pages after."""
+    value, last_id = _decode_page_cursor(cursor, sort)
+    if sort == "created":
+        try:
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError("Invalid page cursor.")
+    return value, last_id
+
+def get_components_page(component_type=None, after=None, search=None, limit=PAGE_SIZE,
+                        min_teeth=None, max_teeth=None):
+    """
+    Get one page of components ordered by name.
+    Returns a dict with the components and the cursor of the next page (None on the last page).
+    Raises ValueError for a malformed cursor.
+    """
+    after_key = _decode_page_cursor(after, "name") if after else None
+
+    components, has_more = database_manager.get_components_page(
+        _page_size(limit),
+        after=after_key,
+        type=component_type,
+        search=search,
+        min_teeth=min_teeth,
+        max_teeth=max_teeth
+    )
+
+    next_cursor = None
+    if has_more and components:
+        last = components[-1]
+        next_cursor = encode_cursor("name", last.name, last.id)
+
+    return {"components": components, "next_cursor": next_cursor}
+
+def component_to_dict(comp):
+    """JSON-serializable representation of a component."""
+    return {
+        "id": comp.id,
+        "name": comp.name,
+        "type": comp.type,
+        "speed": comp.speed,
+        "teeth": parse_teeth(comp.teeth),
+        "comments": comp.comments
+    }
+
+def refresh_configuration_ranges(component_id=None, only_missing=False):
+    """
+    Recompute and persist the stored total range of configurations.
+    Limited to configurations using component_id if given, or to rows without a stored range.
+    """
+    configs = database_manager.get_configurations_with_components(
+        component_id=component_id,
+        missing_total_range=only_missing
+    )
+    ranges = {}
+    for config in configs:
+        try:
+            ranges[config.id] = _component_pair_range(config.front_component_id, config.rear_component_id)
+        except Exception as e:
+            logger.warning(f"Skipping range refresh for config {config.id} due to error: {e}")
+
+    if ranges:
+        database_manager.update_configuration_ranges(ranges)
+        logger.info(f"Refreshed total range for {len(ranges)} configuration(s)")
+    return len(ranges)
+
+def _configuration_total_range(front_id, rear_id):
+    """Total range for a pair of component IDs, or None if either is missing or unparseable."""
+    front = database_manager.get_component(front_id)
+    rear = database_manager.get_component(rear_id)
+    if not front or not rear:
+        return None
+    try:
+        return _component_pair_range(front, rear)
+    except ValueError:
+        return None
+
+def _component_pair_range(front, rear):
+    """Total range of two Component rows, from the precomputed teeth columns when available."""
+    if not front.teeth_count or not rear.teeth_count:
+        return calculate_total_range_value(parse_teeth(front.teeth), parse_teeth(rear.teeth))
+    return calculate_total_range_from_stats(front.teeth_min, front.teeth_max, rear.teeth_min, rear.teeth_max)
 
 def get_component_options(component_type):
-    """Get component options for dropdowns."""
+    """
+    Get component options for dropdowns.
+    Options are built once per type and cached until the component library changes.
+    The returned list is shared and must not be modified.
+    """
+    options = _component_options.get(component_type)
+    if options is not None:
+        return options
+
+    generation = _component_options_generation
+    options = _build_component_options(component_type)
+    with _component_options_lock:
+        # Only keep the result if no component was saved or deleted while building it
+        if generation == _component_options_generation:
+            _component_options[component_type] = options
+    return options
+
+def _build_component_options(component_type):
     components = database_manager.get_components(type=component_type)
     options = []
     for comp in components:
+        text = f"{comp.name} ({comp.speed}s)" if comp.speed else comp.name
+        teeth = parse_teeth(comp.teeth)
         options.append({
             "value": comp.id,
-            "text": f"{comp.name} ({comp.speed}s)" if comp.speed else comp.name,
-            "teeth": json.loads(comp.teeth)
+            "text": text,
+            "teeth": teeth,
+            "label": f"{text} ({', '.join(map(str, teeth))}T)"
         })
     return options
 
+def invalidate_component_options():
+    """Drop cached dropdown options after the component library changes."""
+    global _component_options_generation
+    with _component_options_lock:
+        _component_options_generation += 1
+        _component_options.clear()
+
+def _components_changed():
+    """Invalidate everything derived from the component library."""
+    invalidate_component_options()
+
+def _on_external_data_change(kinds):
+    """Another process wrote to the database: drop everything cached from the changed data."""
+    if "components" in kinds:
+        _components_changed()
+        gear_ratio_index.invalidate()
+
+database_manager.add_data_change_listener(_on_external_data_change)
+
 def create_configuration(name, front_id, rear_id, comments=None):
     """Create a new gear configuration."""
-    return database_manager.add_configuration(name, front_id, rear_id, comments)
+    total_range = _configuration_total_range(front_id, rear_id)
+    return database_manager.add_configuration(name, front_id, rear_id, comments, total_range)
 
 def update_configuration(config_id, name, front_id, rear_id, comments=None):
     """Update an existing gear configuration."""
-    return database_manager.update_configuration(config_id, name, front_id, rear_id, comments)
+    total_range = _configuration_total_range(front_id, rear_id)
+    return database_manager.update_configuration(config_id, name, front_id, rear_id, comments, total_range)
 
-def save_component(name, type, teeth_str, speed=None, comments=None, component_id=None):
-    """Create or update a component."""
-    # Validate teeth input (comma separated integers)
+COMPONENT_TYPES = ("Chainring", "Cassette")
+
+# Rows per insert/transaction when importing components in bulk
+IMPORT_CHUNK_SIZE = 100
+
+def validate_teeth(teeth_str, speed=None):
+    """
+    Validate teeth input (comma separated integers or a list) and an optional speed.
+    Returns the teeth as a list of integers, raises ValueError if invalid.
+    """
     try:
         # Handle if teeth_str is already a list (e.g. from JSON payload)
         if isinstance(teeth_str, list):
@@ -180,9 +409,7 @@ def save_component(name, type, teeth_str, speed=None, comments=None, component_i
         for tooth in teeth_list:
             if tooth <= 0:
                 raise ValueError("Teeth values must be positive integers.")
-
-        teeth_json = json.dumps(teeth_list)
-    except ValueError as e:
+    except (TypeError, ValueError) as e:
         if "positive integers" in str(e):
             raise e
         raise ValueError("Invalid teeth format. Must be comma-separated whole numbers (integers) only, no decimals.")
@@ -194,17 +421,127 @@ def save_component(name, type, teeth_str, speed=None, comments=None, component_i
         if speed != len(teeth_list):
             raise ValueError(f"Speed value ({speed}) must match the number of teeth values ({len(teeth_list)}).")
 
+    return teeth_list
+
+def save_component(name, type, teeth_str, speed=None, comments=None, component_id=None):
+    """Create or update a component."""
+    teeth_list = validate_teeth(teeth_str, speed)
+
     if component_id:
-        return database_manager.update_component(component_id, name, type, teeth_json, speed, comments)
+        result = database_manager.update_component(component_id, name, type, teeth_list, speed, comments)
+        # Teeth may have changed, so stored ranges of configurations using this component are stale
+        refresh_configuration_ranges(component_id=component_id)
+        if result:
+            gear_ratio_index.upsert([{"id": component_id, "name": name, "type": type, "teeth": teeth_list}])
+    else:
+        result = database_manager.add_component(name, type, teeth_list, speed, comments)
+        gear_ratio_index.upsert([result])
+
+    _components_changed()
+    return result
+
+def _validate_import_row(row):
+    """Validate one imported row (a dict of strings or JSON values) and return it ready for insertion."""
+    if isinstance(row, ValueError):
+        # A line the reader could not parse (see component_io.read_components)
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("Each row must be an object with name, type and teeth.")
+
+    name = _import_text(row, "name").strip()
+    if not name:
+        raise ValueError("Name is required.")
+
+    type = _import_text(row, "type").strip()
+    if type not in COMPONENT_TYPES:
+        raise ValueError(f"Type must be one of {', '.join(COMPONENT_TYPES)}.")
+
+    speed = row.get("speed")
+    if speed in (None, ""):
+        speed = None
     else:
-        return database_manager.add_component(name, type, teeth_json, speed, comments)
+        try:
+            speed = int(speed)
+        except (TypeError, ValueError):
+            raise ValueError("Speed must be a positive integer.")
+
+    teeth = row.get("teeth")
+    if teeth is None:
+        raise ValueError("Teeth are required.")
+    teeth_list = validate_teeth(teeth if isinstance(teeth, list) else str(teeth), speed)
+
+    return {
+        "name": name,
+        "type": type,
+        "speed": speed,
+        "teeth": teeth_list,
+        "comments": _import_text(row, "comments") or None
+    }
+
+def _import_text(row, field):
+    """A text field of an imported row, "" if missing; raises ValueError for JSON numbers, lists and objects."""
+    value = row.get(field)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"{field.capitalize()} must be text.")
+    return value
+
+def import_components(rows, chunk_size=IMPORT_CHUNK_SIZE, max_errors=20):
+    """
+    Validate and insert components from an iterable of dicts (name, type, teeth, speed, comments).
+    Rows are consumed lazily and inserted in chunks, each in its own transaction.
+    Invalid rows are skipped. Returns a report with counts and the first max_errors errors.
+    If reading fails part-way, chunks already inserted stay committed and the caches are still refreshed.
+    """
+    imported = 0
+    skipped = 0
+    errors = []
+    chunk = []
+
+    try:
+        for line_no, row in enumerate(rows, start=1):
+            try:
+                chunk.append(_validate_import_row(row))
+            except ValueError as e:
+                skipped += 1
+                if len(errors) < max_errors:
+                    errors.append({"row": line_no, "error": str(e)})
+                continue
+
+            if len(chunk) >= chunk_size:
+                imported += _insert_components(chunk)
+                chunk = []
+
+        if chunk:
+            imported += _insert_components(chunk)
+    finally:
+        if imported:
+            _components_changed()
+    logger.info(f"Imported {imported} component(s), skipped {skipped} invalid row(s)")
+
+    return {"imported": imported, "skipped": skipped, "errors": errors}
+
+def _insert_components(rows):
+    # One transaction per chunk, so a chunk is either fully inserted and counted or not at all
+    records = database_manager.add_components_bulk(rows, chunk_size=len(rows))
+    gear_ratio_index.upsert(records)
+    return len(records)
+
+def iter_component_rows(batch_size=500):
+    """Yield batches of components as export-ready dicts (teeth as lists of ints)."""
+    yield from database_manager.iter_components(batch_size)
+
+def iter_configuration_rows(batch_size=500):
+    """Yield batches of configurations as dicts with both components' names and teeth (see database_manager.iter_configurations)."""
+    yield from database_manager.iter_configurations(batch_size)
 
 def get_component(component_id):
     """Get a single component."""
     comp = database_manager.get_component(component_id)
     if comp:
         # Parse teeth for frontend
-        comp.teeth_list = json.loads(comp.teeth)
+        comp.teeth_list = parse_teeth(comp.teeth)
         # Format teeth string for edit form
         comp.teeth_str = ", ".join(map(str, comp.teeth_list))
     return comp
@@ -213,6 +550,28 @@ def get_components_by_type(component_type):
     """Get all components of a specific type."""
     return database_manager.get_components(type=component_type)
 
+def _loaded_ratio_index():
+    gear_ratio_index.ensure_loaded(database_manager.get_components)
+    return gear_ratio_index
+
+def find_ratios_between(min_ratio, max_ratio, limit=PAGE_SIZE):
+    """
+    Find every chainring tooth x cog combination in the library with a ratio in [min_ratio, max_ratio].
+    Returns a dict with the total number of matches and the first limit of them in ascending ratio order.
+    """
+    if min_ratio <= 0 or max_ratio <= 0:
+        raise ValueError("Ratios must be greater than 0.")
+    if min_ratio > max_ratio:
+        raise ValueError("Minimum ratio cannot be greater than maximum ratio.")
+    total, matches = _loaded_ratio_index().between(min_ratio, max_ratio, _page_size(limit))
+    return {"total": total, "items": matches}
+
+def find_nearest_ratios(ratio, k=10):
+    """Find the k chainring tooth x cog combinations in the library closest to ratio, closest first."""
+    if ratio <= 0:
+        raise ValueError("Ratio must be greater than 0.")
+    return _loaded_ratio_index().nearest(ratio, _page_size(k))
+
 def get_configuration_details(config_id):
     """Get details for a specific configuration including calculated ratios."""
     config = database_manager.get_configuration(config_id)
@@ -234,7 +593,7 @@ def get_configuration_details(config_id):
     preferences = database_manager.get_user_preferences()
 
     # Calculate ratios with preferences
-    gear_tables = calculate_gear_ratios(front_teeth, rear_teeth, preferences)
+    gear_tables = get_cached_gear_ratios(front_teeth, rear_teeth, preferences)
     
     # Calculate overall total range for the configuration
     total_range = calculate_total_range_value(front_teeth, rear_teeth)
@@ -249,14 +608,20 @@ def get_configuration_details(config_id):
 
 def delete_component(component_id):
     """Delete a component and all configurations that use it."""
-    # First, find and delete all configurations using this component
-    configs = database_manager.get_configurations_using_component(component_id)
-    for config in configs:
-        logger.info(f"Deleting configuration {config.name} (id: {config.id}) that uses component {component_id}")
-        database_manager.delete_configuration(config.id)
+    components_deleted, _ = delete_components([component_id])
+    return components_deleted
 
-    # Then delete the component itself
-    return database_manager.delete_component(component_id)
+def delete_components(component_ids):
+    """
+    Delete many components and all configurations that use them in one transaction.
+    Returns a tuple of (components deleted, configurations deleted).
+    """
+    component_ids = list(component_ids)
+    components_deleted, configurations_deleted = database_manager.delete_components(component_ids)
+    gear_ratio_index.remove(component_ids)
+    logger.info(f"Deleted {components_deleted} component(s) and {configurations_deleted} configuration(s) using them")
+    _components_changed()
+    return components_deleted, configurations_deleted
 
 def delete_configuration(config_id):
     return database_manager.delete_configuration(config_id)
@@ -272,4 +637,90 @@ def calculate_from_components(front_id, rear_id):
     # Get user preferences for color coding
     preferences = database_manager.get_user_preferences()
 
-    return calculate_gear_ratios(front.teeth_list, rear.teeth_list, preferences)
+    return get_cached_gear_ratios(front.teeth_list, rear.teeth_list, preferences)
+
+def calculate_metrics_from_components(front_id, rear_id, circumference_mm=None, crank_length_mm=None, cadences=None):
+    """
+    Metrics tables for a chainring/cassette pair by component ID, or None if either is missing.
+    Returns a dict with the parameters used and the per-chainring tables.
+    """
+    parameters = _metrics_parameters(circumference_mm, crank_length_mm, cadences)
+    front = database_manager.get_component(front_id)
+    rear = database_manager.get_component(rear_id)
+    if not front or not rear:
+        return None
+    tables = calculate_gear_metrics_batch([(parse_teeth(front.teeth), parse_teeth(rear.teeth))], *parameters)[0]
+    return {**_metrics_parameters_dict(parameters), "tables": tables}
+
+def _metrics_parameters_dict(parameters):
+    circumference_mm, crank_length_mm, cadences = parameters
+    return {"wheel_circumference": circumference_mm, "crank_length": crank_length_mm, "cadences": list(cadences)}
+
+def get_configuration_metrics(config_ids, circumference_mm=None, crank_length_mm=None, cadences=None):
+    """
+    Metrics tables for many saved configurations, loaded with one query and computed in one batch.
+    Unknown IDs are left out. Returns a dict with the parameters used and one item per
+    configuration, in the order of config_ids.
+    """
+    parameters = _metrics_parameters(circumference_mm, crank_length_mm, cadences)
+    configs = _load_configurations(config_ids)
+    tables = calculate_gear_metrics_batch(
+        [(parse_teeth(c.front_component_id.teeth), parse_teeth(c.rear_component_id.teeth)) for c in configs],
+        *parameters
+    )
+    items = [{**_configuration_summary(config), "tables": config_tables} for config, config_tables in zip(configs, tables)]
+    return {**_metrics_parameters_dict(parameters), "items": items}
+
+def _load_configurations(config_ids):
+    """Load configurations with their components in one query, in the order of config_ids, skipping unknown IDs."""
+    config_ids = list(dict.fromkeys(config_ids))
+    if len(config_ids) > MAX_PAGE_SIZE:
+        raise ValueError(f"At most {MAX_PAGE_SIZE} configurations can be requested at once.")
+    configs = {c.id: c for c in database_manager.get_configurations_with_components(ids=config_ids)}
+    return [configs[config_id] for config_id in config_ids if config_id in configs]
+
+def _configuration_summary(config):
+    return {
+        "configuration_id": config.id,
+        "name": config.name,
+        "front_name": config.front_component_id.name,
+        "rear_name": config.rear_component_id.name
+    }
+
+def _overlap_tolerance(tolerance_pct):
+    if tolerance_pct is None:
+        return gear_engine.DEFAULT_OVERLAP_TOLERANCE_PCT
+    if not 0 <= tolerance_pct <= 25:
+        raise ValueError("Tolerance must be between 0 and 25 percent.")
+    return float(tolerance_pct)
+
+def analyze_overlap_from_components(front_id, rear_id, tolerance_pct=None):
+    """
+    Overlap analysis (near-duplicate gears, unique gear count and shift sequence) for a
+    chainring/cassette pair by component ID, or None if either is missing.
+    """
+    tolerance_pct = _overlap_tolerance(tolerance_pct)
+    front = database_manager.get_component(front_id)
+    rear = database_manager.get_component(rear_id)
+    if not front or not rear:
+        return None
+    analysis = gear_engine.analyze_overlap_batch([(parse_teeth(front.teeth), parse_teeth(rear.teeth))], tolerance_pct)[0]
+    return {"tolerance_pct": tolerance_pct, **analysis}
+
+def analyze_configuration_overlap(config_ids, tolerance_pct=None):
+    """
+    Overlap analysis for many saved configurations, loaded with one query and analysed in one batch.
+    Unknown IDs are left out. Returns a dict with the tolerance used and one item per configuration.
+    """
+    tolerance_pct = _overlap_tolerance(tolerance_pct)
+    configs = _load_configurations(config_ids)
+    analyses = gear_engine.analyze_overlap_batch(
+        [(parse_teeth(c.front_component_id.teeth), parse_teeth(c.rear_component_id.teeth)) for c in configs],
+        tolerance_pct
+    )
+    items = [{**_configuration_summary(config), **analysis} for config, analysis in zip(configs, analyses)]
+    return {"tolerance_pct": tolerance_pct, "items": items}
+
+def update_user_preferences(min_ratio, max_ratio):
+    """Update the preferred ratio range."""
+    return database_manager.update_user_preferences(min_ratio, max_ratio)
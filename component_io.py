@@ -0,0 +1,131 @@
+"""Bulk import and export of the component library as CSV, JSON or JSON Lines.
+
+Usage:
+    python component_io.py import catalogue.csv
+    python component_io.py import - --format jsonl < catalogue.jsonl
+    python component_io.py export --format csv --output components.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import sys
+
+import business_logic
+import database_manager
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "json", "jsonl")
+FIELDS = ("name", "type", "speed", "teeth", "comments")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+}
+
+def detect_format(filename, default="csv"):
+    """Guess the format from a file name extension."""
+    if filename:
+        extension = filename.rsplit(".", 1)[-1].lower()
+        if extension in FORMATS:
+            return extension
+        if extension == "ndjson":
+            return "jsonl"
+    return default
+
+def read_components(stream, fmt):
+    """
+    Yield component rows as dicts from a text stream.
+    CSV and JSON Lines are read line by line; JSON expects a top-level array and is parsed whole.
+    A JSON Lines line that is not valid JSON is yielded as a ValueError, so it can be reported
+    as an invalid row without stopping the rest of the file.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield ValueError(f"Invalid JSON: {e.msg}.")
+    elif fmt == "json":
+        rows = json.load(stream)
+        if not isinstance(rows, list):
+            raise ValueError("JSON import expects an array of components.")
+        yield from rows
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+def import_file(binary_stream, fmt, chunk_size=business_logic.IMPORT_CHUNK_SIZE):
+    """Import components from a binary file object (UTF-8). Returns the business_logic.import_components report."""
+    stream = io.TextIOWrapper(binary_stream, encoding="utf-8", newline="")
+    try:
+        return business_logic.import_components(read_components(stream, fmt), chunk_size=chunk_size)
+    finally:
+        stream.detach()
+
+def write_components(batches, fmt):
+    """Yield export text, one chunk per batch of component dicts (see business_logic.iter_component_rows)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        yield buffer.getvalue()
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows({**row, "teeth": ",".join(map(str, row["teeth"]))} for row in batch)
+            yield buffer.getvalue()
+    elif fmt == "jsonl":
+        for batch in batches:
+            yield "".join(json.dumps({field: row[field] for field in FIELDS}) + "\n" for row in batch)
+    else:
+        separator = "["
+        for batch in batches:
+            yield separator + ",".join(json.dumps({field: row[field] for field in FIELDS}) for row in batch)
+            separator = ","
+        yield "]\n" if separator == "," else "[]\n"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export the Gear Calc component library.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import components from a file")
+    import_parser.add_argument("path", help="File to import, or - for stdin")
+    import_parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, or csv")
+    import_parser.add_argument("--chunk-size", type=int, default=business_logic.IMPORT_CHUNK_SIZE)
+
+    export_parser = subparsers.add_parser("export", help="Export all components")
+    export_parser.add_argument("--format", choices=FORMATS, default="csv")
+    export_parser.add_argument("--output", help="Output file (default: stdout)")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+    database_manager.initialize_db()
+
+    with database_manager.connection():
+        if args.command == "import":
+            fmt = args.format or detect_format(args.path)
+            stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+            with stream:
+                report = import_file(stream, fmt, chunk_size=args.chunk_size)
+            print(json.dumps(report, indent=2))
+        else:
+            output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+            try:
+                for chunk in write_components(business_logic.iter_component_rows(), args.format):
+                    output.write(chunk)
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+
+if __name__ == "__main__":
+    main()
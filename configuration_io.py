@@ -0,0 +1,108 @@
+"""Streaming export of saved configurations with their full gear tables, as CSV or JSON Lines.
+
+Configurations are read in keyset batches and each batch's gear tables are
+calculated in one vectorized call, so an export of any size holds only one
+batch in memory.
+
+Usage:
+    python configuration_io.py --format jsonl --output configurations.jsonl
+    python configuration_io.py --format csv > configurations.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import sys
+
+import business_logic
+import database_manager
+import gear_engine
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+# One CSV row per gear; the configuration columns repeat on each row
+CSV_FIELDS = (
+    "id", "name", "front_name", "rear_name", "total_range", "comments", "created_at",
+    "front_tooth", "gear_num", "rear_tooth", "ratio", "change_pct", "status"
+)
+EXPORT_BATCH_SIZE = 500
+
+def _with_tables(batch, preferences):
+    """Pair each configuration dict of a batch with its gear tables, calculated together."""
+    tables = business_logic.calculate_gear_ratios_batch(
+        [(row["front_teeth"], row["rear_teeth"]) for row in batch], preferences
+    )
+    for row in batch:
+        if row["total_range"] is None:
+            row["total_range"] = business_logic.calculate_total_range_value(row["front_teeth"], row["rear_teeth"])
+        row["created_at"] = row["created_at"].isoformat(sep=" ", timespec="seconds")
+    return zip(batch, tables)
+
+def write_configurations(batches, fmt, preferences=None):
+    """
+    Yield export text, one chunk per batch of configuration dicts (see business_logic.iter_configuration_rows).
+    Gear tables are coloured with preferences, or with the saved preferences when not given.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_FIELDS)
+        yield buffer.getvalue()
+
+    for batch in batches:
+        if preferences is None:
+            preferences = database_manager.get_user_preferences()
+
+        if fmt == "jsonl":
+            yield "".join(
+                json.dumps({**row, "gear_tables": gear_engine.tables_to_dicts(tables)}) + "\n"
+                for row, tables in _with_tables(batch, preferences)
+            )
+            continue
+
+        buffer.seek(0)
+        buffer.truncate()
+        for row, tables in _with_tables(batch, preferences):
+            config_columns = (
+                row["id"], row["name"], row["front_name"], row["rear_name"],
+                row["total_range"], row["comments"] or "", row["created_at"]
+            )
+            for table in tables:
+                for gear_num, rear_tooth, ratio, change_pct, status in table.rows():
+                    writer.writerow(config_columns + (
+                        table.front_tooth, gear_num, rear_tooth, ratio,
+                        "" if change_pct is None else change_pct, status
+                    ))
+        yield buffer.getvalue()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export Gear Calc configurations with their gear tables.")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+    database_manager.initialize_db()
+
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with database_manager.connection():
+            for chunk in write_configurations(business_logic.iter_configuration_rows(args.batch_size), args.format):
+                output.write(chunk)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,496 @@
-from peewee import SqliteDatabase
-from database_model import db, Component, GearConfiguration, UserPreference
+from peewee import chunked, fn
+from playhouse.migrate import SqliteMigrator, migrate
+from playhouse.pool import PooledSqliteDatabase
+from database_model import db, Component, GearConfiguration, UserPreference, DataVersion, TeethField
+from read_model import ReadModel
 from utils import generate_uuid, empty_to_none
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextlib
+import contextvars
+import functools
 import logging
 import datetime
 import os
+import secrets
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 DATABASE_PATH = os.getenv("DATABASE_PATH", "./data/gear_calc.db")
 os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
 
-def initialize_db():
-    """Initialize the database connection and create tables."""
-    database = SqliteDatabase(DATABASE_PATH)
+# Blocking peewee calls from async routes run here instead of on the event loop
+DB_THREADS = int(os.getenv("DB_THREADS", "4"))
+_executor = None
+
+# Connection pool: each thread checks out its own connection, closing returns it to the pool
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", str(DB_THREADS + 4)))
+DB_STALE_TIMEOUT = int(os.getenv("DB_STALE_TIMEOUT", "300"))  # seconds before an idle connection is recycled
+
+# WAL lets readers proceed while a writer commits; busy_timeout makes writers wait instead of failing with "database is locked"
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "wal"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "normal"),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-16000")),  # negative values are KiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024))),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),  # milliseconds
+}
+
+# Version counters for each kind of data, stored in the DataVersion table and bumped on every
+# write in this module. This process's last seen values are kept here; ETags are built from
+# them, and caches are dropped through the change listeners when another process has written.
+DATA_KINDS = ("components", "configurations", "preferences")
+_data_versions = dict.fromkeys(DATA_KINDS, 0)
+_versions_lock = threading.Lock()
+_data_change_listeners = []
+# Versions up to _accounted_versions are known to this process: its own writes or changes already handled.
+# Own versions above that (written by a thread that finished before an earlier one) wait in _own_versions,
+# and _writes_in_flight counts own bumps that have not reported their version yet.
+_accounted_versions = dict.fromkeys(DATA_KINDS, 0)
+_own_versions = {kind: set() for kind in DATA_KINDS}
+_writes_in_flight = dict.fromkeys(DATA_KINDS, 0)
+# Random generation of the database contents, stored in the DataVersion table as the "epoch" row
+# and replaced when the schema is created or upgraded and when the server starts (initialize_db(new_epoch=True)).
+# It is part of every version token, so a database restored from a backup (whose counters are back
+# at older values) never produces an ETag served before.
+EPOCH_KIND = "epoch"
+_epoch = 0
+
+# In-memory copy of the UserPreference singleton, see get_user_preferences()
+_preferences = None
+_preferences_lock = threading.Lock()
+
+# Serve component and configuration reads from an in-memory copy of both tables, written
+# through on every change (see read_model). Off by default: every read queries SQLite.
+IN_MEMORY_READS = os.getenv("IN_MEMORY_READS", "0").lower() in ("1", "true", "yes")
+_read_model = ReadModel() if IN_MEMORY_READS else None
+# Held across each write and its write-through, so the model sees writes in the order they committed
+_model_write_lock = threading.RLock()
+
+class InstrumentedSqliteDatabase(PooledSqliteDatabase):
+    """Pooled SQLite database that reports the count and duration of every statement to metrics."""
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute_sql(sql, params, *args, **kwargs)
+        finally:
+            metrics.record_query(time.perf_counter() - started)
+
+def initialize_db(new_epoch=False):
+    """
+    Initialize the database connection and create or upgrade the tables.
+    With new_epoch, also store a new database epoch (the server does this on startup). Otherwise an
+    existing, up-to-date database is not written to, so read-only tools can open the live database.
+    """
+    global _preferences, _executor
+    _preferences = None
+    if _read_model is not None:
+        _read_model.invalidate()
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+    database = InstrumentedSqliteDatabase(
+        DATABASE_PATH,
+        pragmas=SQLITE_PRAGMAS,
+        max_connections=DB_MAX_CONNECTIONS,
+        stale_timeout=DB_STALE_TIMEOUT,
+        check_same_thread=False  # pooled connections are handed to whichever thread checks them out
+    )
     db.initialize(database)
-    db.connect()
-    _create_tables()
-    logger.info("Database initialized and tables created.")
+    with connection():
+        version = db.pragma("user_version")
+        if version < SCHEMA_VERSION:
+            # Workers starting together upgrade one at a time; the others find it done
+            with db.atomic(lock_type="IMMEDIATE"):
+                version = db.pragma("user_version")
+                if version < SCHEMA_VERSION:
+                    _create_tables()
+                    _migrate_schema()
+                    db.pragma("user_version", SCHEMA_VERSION)
+                    _store_new_epoch()
+                    logger.info(f"Database schema created or upgraded from version {version} to {SCHEMA_VERSION}.")
+        elif version > SCHEMA_VERSION:
+            logger.warning(f"Database schema version {version} is newer than this app ({SCHEMA_VERSION}).")
+        if new_epoch:
+            _store_new_epoch()
+        _reset_data_versions(_read_data_versions())
+    logger.info(f"Database initialized (pragmas: {SQLITE_PRAGMAS}).")
+
+def _store_new_epoch():
+    DataVersion.replace(kind=EPOCH_KIND, version=secrets.randbits(31)).execute()
+
+def close_db():
+    """Stop the database thread pool and close every pooled connection."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    if not db.is_closed():
+        db.close()
+    db.close_all()
+    logger.info("Database closed.")
+
+def connection():
+    """
+    Context manager that checks a connection out of the pool for the current thread
+    and returns it when the block exits. Nested uses share the outer connection.
+    """
+    return db.connection_context()
+
+def _call_with_connection(func, args, kwargs):
+    with connection():
+        return func(*args, **kwargs)
+
+_EXHAUSTED = object()
+
+async def iterate_sync(iterator):
+    """
+    Async generator over a blocking iterator. Each step runs through run_sync,
+    so iterators that query the database lazily work with streaming responses.
+    """
+    while True:
+        item = await run_sync(next, iterator, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return
+        yield item
+
+async def run_sync(func, *args, **kwargs):
+    """
+    Run a blocking function that touches the database on the database thread pool.
+    A connection is opened for the duration of the call and closed afterwards,
+    so the event loop keeps serving other requests while queries run.
+    The caller's context variables (e.g. the current request's metrics) are visible to func.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor, functools.partial(context.run, _call_with_connection, func, args, kwargs)
+    )
+
+def get_data_version(*names):
+    """
+    Current version token for the given kinds of data ("components", "configurations", "preferences").
+    Tokens come from the shared DataVersion table and start with the database epoch, so every
+    worker process builds the same one and a restored database never repeats an earlier token;
+    call refresh_data_versions first to see writes from other processes.
+    """
+    return ":".join([str(_epoch)] + [str(_data_versions[name]) for name in names])
+
+def add_data_change_listener(callback):
+    """Register callback(kinds) to be called when another process has written data of those kinds."""
+    _data_change_listeners.append(callback)
+
+def refresh_data_versions():
+    """Pick up writes made by other processes with one small query, notifying listeners of changed kinds."""
+    _apply_data_versions(_read_data_versions())
+
+def _read_data_versions():
+    return dict(DataVersion.select(DataVersion.kind, DataVersion.version).tuples())
+
+def _reset_data_versions(versions):
+    global _epoch
+    with _versions_lock:
+        _epoch = versions.get(EPOCH_KIND, 0)
+        for kind in DATA_KINDS:
+            _data_versions[kind] = _accounted_versions[kind] = versions.get(kind, 0)
+            _own_versions[kind].clear()
+
+def _bump_data_version(*names):
+    with _versions_lock:
+        for name in names:
+            _writes_in_flight[name] += 1
+    try:
+        with db.atomic():
+            DataVersion.update(version=DataVersion.version + 1).where(DataVersion.kind.in_(names)).execute()
+            versions = _read_data_versions()
+    except BaseException:
+        with _versions_lock:
+            for name in names:
+                _writes_in_flight[name] -= 1
+        raise
+    # Inside the write transaction the counters are exactly this write's versions
+    _apply_data_versions(versions, own={name: versions[name] for name in names})
+
+def _apply_data_versions(versions, own=None):
+    """
+    Store versions read from the database; own maps the kinds this process just bumped to its version.
+    Versions only ever move forward, whatever order concurrent threads report them in. A kind was
+    changed elsewhere when more of its versions are unaccounted for than this process has writes
+    in flight: the cached preferences are then dropped and listeners run.
+    """
+    global _preferences
+    own = own or {}
+    changed = set()
+    if versions.get(EPOCH_KIND, _epoch) != _epoch:
+        # Another process initialized the database, which may have been replaced: start over
+        _reset_data_versions(versions)
+        changed.update(DATA_KINDS)
+    with _versions_lock:
+        for kind, version in versions.items():
+            if kind not in _data_versions:
+                continue
+            pending = _own_versions[kind]
+            if kind in own:
+                _writes_in_flight[kind] -= 1
+                if own[kind] > _accounted_versions[kind]:
+                    pending.add(own[kind])
+            _data_versions[kind] = max(_data_versions[kind], version)
+
+            accounted = _accounted_versions[kind]
+            while accounted + 1 in pending:
+                accounted += 1
+                pending.discard(accounted)
+            unknown = _data_versions[kind] - accounted - len(pending)
+            if unknown > _writes_in_flight[kind]:
+                changed.add(kind)
+                accounted = _data_versions[kind]
+                pending.clear()
+            _accounted_versions[kind] = accounted
+
+    if changed:
+        logger.debug(f"Data changed in another process: {', '.join(sorted(changed))}")
+        if "preferences" in changed:
+            _preferences = None
+        if _read_model is not None and changed & {"components", "configurations"}:
+            _read_model.invalidate()
+        for listener in _data_change_listeners:
+            listener(changed)
+
+class DataVersionMiddleware:
+    """
+    ASGI middleware that refreshes the data versions before every request (static files excepted),
+    so with several worker processes no request is served from caches another worker has made stale.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith("/static/"):
+            await run_sync(refresh_data_versions)
+        await self.app(scope, receive, send)
+
+def _loaded_read_model():
+    """The read model, loaded with one query per table on first use, or None when IN_MEMORY_READS is off."""
+    if _read_model is not None:
+        _read_model.ensure_loaded(_load_read_model_rows)
+    return _read_model
+
+def _load_read_model_rows():
+    with connection():
+        return list(Component.select().dicts()), list(GearConfiguration.select().dicts())
+
+def load_read_model():
+    """Load the read model now instead of on the first read. Returns its stats, or None when it is off."""
+    model = _loaded_read_model()
+    return model.stats() if model is not None else None
+
+@contextlib.contextmanager
+def _model_writes():
+    """Serialize a database write with its _write_through when the read model is enabled."""
+    if _read_model is None:
+        yield
+        return
+    with _model_write_lock:
+        yield
+
+def _write_through(apply):
+    """
+    Apply a committed write to the read model with apply(model); call inside the _model_writes()
+    block that made the write. Inside an enclosing transaction the write may still roll back,
+    so the model is dropped and reloaded instead.
+    """
+    if _read_model is None:
+        return
+    if db.in_transaction():
+        _read_model.invalidate()
+    else:
+        apply(_read_model)
+
+# Stored in PRAGMA user_version once tables, indexes and columns are up to date, so later
+# startups skip schema work entirely. Bump it whenever the models or _ADDED_COLUMNS change.
+SCHEMA_VERSION = 2
 
 def _create_tables():
-    with db:
-        db.create_tables([Component, GearConfiguration, UserPreference], safe=True)
+    with db.atomic():
+        db.create_tables([Component, GearConfiguration, UserPreference, DataVersion], safe=True)
+        DataVersion.insert_many([{"kind": kind, "version": 0} for kind in DATA_KINDS]).on_conflict_ignore().execute()
+
+# Columns added after the initial schema. Existing databases get them on startup.
+_ADDED_COLUMNS = [
+    GearConfiguration.total_range,
+    Component.teeth_min,
+    Component.teeth_max,
+    Component.teeth_count,
+]
+
+def _migrate_schema():
+    """Add any columns from _ADDED_COLUMNS that are missing in an existing database."""
+    migrator = SqliteMigrator(db)
+    operations = []
+    for field in _ADDED_COLUMNS:
+        table = field.model._meta.table_name
+        existing = {column.name for column in db.get_columns(table)}
+        if field.column_name not in existing:
+            logger.info(f"Adding column {table}.{field.column_name}")
+            operations.append(migrator.add_column(table, field.column_name, field))
+
+    if operations:
+        with db.atomic():
+            migrate(*operations)
+
+    _normalize_teeth()
+
+def _normalize_teeth():
+    """Rewrite teeth still stored as text into the packed format and fill in the teeth statistics."""
+    cursor = db.execute_sql(
+        'SELECT "id", "teeth" FROM "component" WHERE typeof("teeth") != \'blob\' OR "teeth_count" IS NULL'
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return
+
+    with db.atomic():
+        for component_id, raw_teeth in rows:
+            try:
+                teeth = TeethField.to_list(raw_teeth)
+            except ValueError:
+                logger.warning(f"Leaving component {component_id} with unparseable teeth: {raw_teeth!r}")
+                continue
+            Component.update(teeth=teeth, **teeth_stats(teeth)).where(Component.id == component_id).execute()
+    logger.info(f"Converted teeth of {len(rows)} component(s) to packed storage")
+
+def teeth_stats(teeth):
+    """Precomputed column values for a list of teeth."""
+    return {
+        "teeth_min": min(teeth) if teeth else None,
+        "teeth_max": max(teeth) if teeth else None,
+        "teeth_count": len(teeth)
+    }
 
 def get_user_preferences():
-    """Get the user preferences. Create default if not exists."""
+    """
+    Get the user preferences. Create default if not exists.
+    The singleton is read from the database once and then served from memory.
+    The returned instance is shared and must not be modified; use update_user_preferences.
+    """
+    global _preferences
+    prefs = _preferences
+    if prefs is not None:
+        return prefs
+
+    with _preferences_lock:
+        if _preferences is None:
+            _preferences = _load_user_preferences()
+        return _preferences
+
+def _load_user_preferences():
     try:
         return UserPreference.get_by_id(1)
     except UserPreference.DoesNotExist:
         return UserPreference.create(min_ratio=0.8, max_ratio=3.2)
 
 def update_user_preferences(min_ratio, max_ratio):
-    """Update user preferences."""
-    prefs = get_user_preferences()
-    prefs.min_ratio = min_ratio
-    prefs.max_ratio = max_ratio
-    prefs.save()
+    """Update user preferences and refresh the in-memory copy."""
+    global _preferences
+    with _preferences_lock:
+        # Save a fresh instance and swap it in, so concurrent readers never see a half-updated object
+        prefs = _load_user_preferences()
+        prefs.min_ratio = min_ratio
+        prefs.max_ratio = max_ratio
+        prefs.save()
+        _preferences = prefs
+        _bump_data_version("preferences")
     return prefs
 
 def add_component(name, type, teeth, speed=None, comments=None):
-    """Add a new component to the database."""
-    try:
-        component = Component.create(
-            id=generate_uuid(),
-            name=name,
-            type=type,
-            speed=speed,
-            teeth=teeth,
-            comments=empty_to_none(comments)
-        )
+    """Add a new component to the database. Teeth is a list of ints."""
+    try:
+        teeth = TeethField.to_list(teeth)
+        with _model_writes():
+            component = Component.create(
+                id=generate_uuid(),
+                name=name,
+                type=type,
+                speed=speed,
+                teeth=teeth,
+                comments=empty_to_none(comments),
+                **teeth_stats(teeth)
+            )
+            _write_through(lambda model: model.put_components([component.__data__]))
+        _bump_data_version("components")
         return component
     except Exception as e:
         logger.error(f"Error adding component: {e}")
         raise
 
+def seed_components(rows):
+    """
+    Insert rows (as for add_components_bulk) only if there are no components yet.
+    The check and the insert share one IMMEDIATE transaction, so workers starting together seed once.
+    Returns the number of components inserted.
+    """
+    try:
+        with db.atomic(lock_type="IMMEDIATE"):
+            if Component.select().exists():
+                return 0
+            return len(add_components_bulk(rows, chunk_size=len(rows)))
+    except Exception as e:
+        logger.error(f"Error seeding components: {e}")
+        raise
+
+def add_components_bulk(rows, chunk_size=100):
+    """
+    Insert many components with multi-row INSERTs, one transaction per chunk.
+    Takes dicts with name, type, teeth (list of ints), speed and comments.
+    Returns the inserted records, as dicts including the generated id.
+    """
+    try:
+        inserted = []
+        for chunk in chunked(rows, chunk_size):
+            records = []
+            for row in chunk:
+                teeth = TeethField.to_list(row["teeth"])
+                records.append({
+                    "id": generate_uuid(),
+                    "name": row["name"],
+                    "type": row["type"],
+                    "speed": row.get("speed"),
+                    "teeth": teeth,
+                    "comments": empty_to_none(row.get("comments")),
+                    **teeth_stats(teeth)
+                })
+            with _model_writes():
+                with db.atomic():
+                    Component.insert_many(records).execute()
+                _write_through(lambda model: model.put_components(records))
+            inserted.extend(records)
+            _bump_data_version("components")
+        return inserted
+    except Exception as e:
+        logger.error(f"Error adding components in bulk: {e}")
+        raise
+
 def update_component(component_id, name, type, teeth, speed=None, comments=None):
-    """Update an existing component."""
+    """Update an existing component. Teeth is a list of ints."""
     try:
-        query = Component.update(
-            name=name,
-            type=type,
-            speed=speed,
-            teeth=teeth,
-            comments=empty_to_none(comments)
-        ).where(Component.id == component_id)
-        return query.execute()
+        teeth = TeethField.to_list(teeth)
+        fields = {
+            "name": name,
+            "type": type,
+            "speed": speed,
+            "teeth": teeth,
+            "comments": empty_to_none(comments),
+            **teeth_stats(teeth)
+        }
+        with _model_writes():
+            result = Component.update(**fields).where(Component.id == component_id).execute()
+            _write_through(lambda model: model.update_component(component_id, fields))
+        _bump_data_version("components")
+        return result
     except Exception as e:
         logger.error(f"Error updating component: {e}")
         raise
@@ -71,6 +498,9 @@ def update_component(component_id, name, type, teeth, speed=None, comments=None)
 def get_components(type=None):
     """Get all components, optionally filtered by type."""
     try:
+        model = _loaded_read_model()
+        if model is not None:
+            return model.get_components(type)
         if type:
             return list(Component.select().where(Component.type == type))
         return list(Component.select())
@@ -78,60 +508,133 @@ def get_components(type=None):
         logger.error(f"Error getting components: {e}")
         return []
 
+def _keyset_after(sort_expr, id_field, after, descending):
+    """WHERE clause selecting rows that come after the (sort value, id) pair in the given order."""
+    value, last_id = after
+    if descending:
+        return (sort_expr < value) | ((sort_expr == value) & (id_field < last_id))
+    return (sort_expr > value) | ((sort_expr == value) & (id_field > last_id))
+
+def _page(query, sort_expr, id_field, limit, after, descending):
+    """Apply keyset ordering and paging. Returns (rows, has_more)."""
+    if after is not None:
+        query = query.where(_keyset_after(sort_expr, id_field, after, descending))
+    if descending:
+        query = query.order_by(sort_expr.desc(), id_field.desc())
+    else:
+        query = query.order_by(sort_expr.asc(), id_field.asc())
+    rows = list(query.limit(limit + 1))
+    return rows[:limit], len(rows) > limit
+
+def get_components_page(limit, after=None, type=None, search=None, min_teeth=None, max_teeth=None):
+    """
+    Get one page of components ordered by name, using keyset pagination.
+    after is the (name, id) of the last component on the previous page.
+    min_teeth / max_teeth filter on the precomputed smallest / largest tooth count.
+    Returns (components, has_more).
+    """
+    try:
+        query = Component.select()
+        if type:
+            query = query.where(Component.type == type)
+        if search:
+            query = query.where(Component.name.contains(search))
+        if min_teeth is not None:
+            query = query.where(Component.teeth_min >= min_teeth)
+        if max_teeth is not None:
+            query = query.where(Component.teeth_max <= max_teeth)
+        return _page(query, Component.name, Component.id, limit, after, descending=False)
+    except Exception as e:
+        logger.error(f"Error getting components page: {e}")
+        return [], False
+
+def iter_components(batch_size=500):
+    """
+    Yield all components as lists of dicts, batch_size rows at a time, ordered by ID.
+    Each batch is a separate keyset query, so the table is never loaded at once
+    and no cursor is held open between batches.
+    """
+    last_id = None
+    while True:
+        query = Component.select().order_by(Component.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Component.id > last_id)
+        batch = list(query.dicts())
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]["id"]
+
 def get_component(component_id):
     """Get a single component by ID."""
     try:
+        model = _loaded_read_model()
+        if model is not None:
+            return model.get_component(component_id)
         return Component.get(Component.id == component_id)
     except Exception as e:
         logger.error(f"Error getting component: {e}")
         return None
 
-def get_configurations_using_component(component_id):
-    """Get all configurations that use a specific component."""
+def delete_components(component_ids, chunk_size=400):
+    """
+    Delete components and every configuration that uses them, in a single transaction.
+    Uses set-based DELETEs (IN lists of at most chunk_size IDs) instead of one query per row.
+    Returns a tuple of (components deleted, configurations deleted).
+    """
+    component_ids = list(component_ids)
     try:
-        configs = GearConfiguration.select().where(
-            (GearConfiguration.front_component_id == component_id) |
-            (GearConfiguration.rear_component_id == component_id)
-        )
-        return list(configs)
+        components_deleted = 0
+        configurations_deleted = 0
+        with _model_writes():
+            with db.atomic():
+                for chunk in chunked(component_ids, chunk_size):
+                    configurations_deleted += GearConfiguration.delete().where(
+                        (GearConfiguration.front_component_id.in_(chunk)) |
+                        (GearConfiguration.rear_component_id.in_(chunk))
+                    ).execute()
+                    components_deleted += Component.delete().where(Component.id.in_(chunk)).execute()
+            _write_through(lambda model: model.delete_components(component_ids))
+        _bump_data_version("components", "configurations")
+        return components_deleted, configurations_deleted
     except Exception as e:
-        logger.error(f"Error getting configurations using component: {e}")
-        return []
-
-def delete_component(component_id):
-    """Delete a component by ID."""
-    try:
-        query = Component.delete().where(Component.id == component_id)
-        return query.execute()
-    except Exception as e:
-        logger.error(f"Error deleting component: {e}")
+        logger.error(f"Error deleting components: {e}")
         raise
 
-def add_configuration(name, front_component_id, rear_component_id, comments=None):
+def add_configuration(name, front_component_id, rear_component_id, comments=None, total_range=None):
     """Add a new gear configuration."""
     try:
-        config = GearConfiguration.create(
-            id=generate_uuid(),
-            name=name,
-            front_component_id=front_component_id,
-            rear_component_id=rear_component_id,
-            comments=empty_to_none(comments)
-        )
+        with _model_writes():
+            config = GearConfiguration.create(
+                id=generate_uuid(),
+                name=name,
+                front_component_id=front_component_id,
+                rear_component_id=rear_component_id,
+                comments=empty_to_none(comments),
+                total_range=total_range
+            )
+            _write_through(lambda model: model.put_configuration(config.__data__))
+        _bump_data_version("configurations")
         return config
     except Exception as e:
         logger.error(f"Error adding configuration: {e}")
         raise
 
-def update_configuration(config_id, name, front_component_id, rear_component_id, comments=None):
+def update_configuration(config_id, name, front_component_id, rear_component_id, comments=None, total_range=None):
     """Update an existing gear configuration."""
     try:
-        query = GearConfiguration.update(
-            name=name,
-            front_component_id=front_component_id,
-            rear_component_id=rear_component_id,
-            comments=empty_to_none(comments)
-        ).where(GearConfiguration.id == config_id)
-        return query.execute()
+        fields = {
+            "name": name,
+            "front_component_id": front_component_id,
+            "rear_component_id": rear_component_id,
+            "comments": empty_to_none(comments),
+            "total_range": total_range
+        }
+        with _model_writes():
+            result = GearConfiguration.update(**fields).where(GearConfiguration.id == config_id).execute()
+            _write_through(lambda model: model.update_configurations({config_id: fields}))
+        _bump_data_version("configurations")
+        return result
     except Exception as e:
         logger.error(f"Error updating configuration: {e}")
         raise
@@ -139,14 +642,138 @@ def update_configuration(config_id, name, front_component_id, rear_component_id,
 def get_configurations():
     """Get all gear configurations."""
     try:
+        model = _loaded_read_model()
+        if model is not None:
+            return model.get_configurations()
         return list(GearConfiguration.select())
     except Exception as e:
         logger.error(f"Error getting configurations: {e}")
         return []
 
+def _configurations_with_components():
+    Front = Component.alias()
+    Rear = Component.alias()
+    return (GearConfiguration
+            .select(GearConfiguration, Front, Rear)
+            .join(Front, on=(GearConfiguration.front_component_id == Front.id))
+            .switch(GearConfiguration)
+            .join(Rear, on=(GearConfiguration.rear_component_id == Rear.id)))
+
+def _uses_component(component_id):
+    return (
+        (GearConfiguration.front_component_id == component_id) |
+        (GearConfiguration.rear_component_id == component_id)
+    )
+
+def iter_configurations(batch_size=500):
+    """
+    Yield all configurations as lists of dicts, batch_size rows at a time, ordered by ID.
+    Each dict has the configuration columns plus the ID, name and teeth of both components.
+    Keyset queries like iter_components; configurations whose components no longer exist are left out.
+    """
+    Front = Component.alias()
+    Rear = Component.alias()
+    last_id = None
+    while True:
+        query = (GearConfiguration
+                 .select(
+                     GearConfiguration.id,
+                     GearConfiguration.name,
+                     GearConfiguration.total_range,
+                     GearConfiguration.comments,
+                     GearConfiguration.created_at,
+                     Front.id.alias("front_component_id"),
+                     Front.name.alias("front_name"),
+                     Front.teeth.alias("front_teeth"),
+                     Rear.id.alias("rear_component_id"),
+                     Rear.name.alias("rear_name"),
+                     Rear.teeth.alias("rear_teeth"))
+                 .join(Front, on=(GearConfiguration.front_component_id == Front.id))
+                 .switch(GearConfiguration)
+                 .join(Rear, on=(GearConfiguration.rear_component_id == Rear.id))
+                 .order_by(GearConfiguration.id)
+                 .limit(batch_size))
+        if last_id is not None:
+            query = query.where(GearConfiguration.id > last_id)
+        batch = list(query.dicts())
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]["id"]
+
+def get_configurations_with_components(component_id=None, missing_total_range=False, ids=None):
+    """
+    Get gear configurations with their front and rear components loaded in a single joined query.
+    Accessing config.front_component_id / config.rear_component_id does not hit the database again.
+    Configurations whose components no longer exist are left out by the inner joins.
+    """
+    try:
+        model = _loaded_read_model()
+        if model is not None:
+            return model.get_configurations_with_components(component_id, missing_total_range, ids)
+        query = _configurations_with_components()
+        if component_id:
+            query = query.where(_uses_component(component_id))
+        if ids is not None:
+            query = query.where(GearConfiguration.id.in_(list(ids)))
+        if missing_total_range:
+            query = query.where(GearConfiguration.total_range.is_null())
+        return list(query)
+    except Exception as e:
+        logger.error(f"Error getting configurations with components: {e}")
+        return []
+
+# Sort keys accepted by get_configurations_page. Missing ranges sort as 0.
+CONFIGURATION_SORTS = {
+    "created": GearConfiguration.created_at,
+    "name": GearConfiguration.name,
+    "range": fn.COALESCE(GearConfiguration.total_range, 0),
+}
+
+def get_configurations_page(limit, sort="created", descending=True, after=None, search=None,
+                            component_id=None, min_range=None, max_range=None):
+    """
+    Get one page of configurations (components joined, as in get_configurations_with_components)
+    using keyset pagination. after is the (sort value, id) of the last row on the previous page.
+    Returns (configurations, has_more).
+    """
+    try:
+        query = _configurations_with_components()
+        if search:
+            query = query.where(GearConfiguration.name.contains(search))
+        if component_id:
+            query = query.where(_uses_component(component_id))
+        if min_range is not None:
+            query = query.where(GearConfiguration.total_range >= min_range)
+        if max_range is not None:
+            query = query.where(GearConfiguration.total_range <= max_range)
+        return _page(query, CONFIGURATION_SORTS[sort], GearConfiguration.id, limit, after, descending)
+    except Exception as e:
+        logger.error(f"Error getting configurations page: {e}")
+        return [], False
+
+def update_configuration_ranges(ranges):
+    """Persist precomputed total ranges. Takes a dict of {config_id: total_range}."""
+    try:
+        with _model_writes():
+            with db.atomic():
+                for config_id, total_range in ranges.items():
+                    GearConfiguration.update(total_range=total_range).where(GearConfiguration.id == config_id).execute()
+            _write_through(lambda model: model.update_configurations(
+                {config_id: {"total_range": total_range} for config_id, total_range in ranges.items()}
+            ))
+        _bump_data_version("configurations")
+        return len(ranges)
+    except Exception as e:
+        logger.error(f"Error updating configuration ranges: {e}")
+        raise
+
 def get_configuration(config_id):
     """Get a single configuration by ID."""
     try:
+        model = _loaded_read_model()
+        if model is not None:
+            return model.get_configuration(config_id)
         return GearConfiguration.get(GearConfiguration.id == config_id)
     except Exception as e:
         logger.error(f"Error getting configuration: {e}")
@@ -155,37 +782,40 @@ def get_configuration(config_id):
 def delete_configuration(config_id):
     """Delete a configuration by ID."""
     try:
-        query = GearConfiguration.delete().where(GearConfiguration.id == config_id)
-        return query.execute()
+        with _model_writes():
+            result = GearConfiguration.delete().where(GearConfiguration.id == config_id).execute()
+            _write_through(lambda model: model.delete_configurations([config_id]))
+        _bump_data_version("configurations")
+        return result
     except Exception as e:
         logger.error(f"Error deleting configuration: {e}")
         raise
 
 def cleanup_orphaned_configurations():
-    """Delete configurations that reference non-existent components."""
+    """
+    Delete configurations that reference non-existent components.
+    Runs as one anti-join DELETE inside a transaction.
+    Returns a dict with the number of deleted configurations and the elapsed time in milliseconds.
+    """
+    started = time.perf_counter()
     try:
-        # Get all component IDs that exist
-        existing_component_ids = set(c.id for c in Component.select(Component.id))
-
-        # Get all configurations with their raw foreign key values
-        all_configs = GearConfiguration.select()
+        existing_ids = Component.select(Component.id)
+        with _model_writes():
+            with db.atomic():
+                deleted_count = GearConfiguration.delete().where(
+                    (GearConfiguration.front_component_id.not_in(existing_ids)) |
+                    (GearConfiguration.rear_component_id.not_in(existing_ids))
+                ).execute()
+            if deleted_count:
+                _write_through(lambda model: model.delete_orphaned_configurations())
+        if deleted_count:
+            _bump_data_version("configurations")
+    except Exception as e:
+        logger.error(f"Error cleaning up orphaned configurations: {e}")
         deleted_count = 0
 
-        for config in all_configs:
-            # Access the raw foreign key ID fields (not the related objects)
-            front_id = config.front_component_id_id
-            rear_id = config.rear_component_id_id
-
-            # Check if the referenced components exist
-            if front_id not in existing_component_ids or rear_id not in existing_component_ids:
-                logger.info(f"Deleting orphaned configuration: {config.id} (name: {config.name})")
-                config.delete_instance()
-                deleted_count += 1
-
-        if deleted_count > 0:
-            logger.info(f"Cleaned up {deleted_count} orphaned configuration(s)")
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    if deleted_count > 0:
+        logger.info(f"Cleaned up {deleted_count} orphaned configuration(s) in {elapsed_ms} ms")
 
-        return deleted_count
-    except Exception as e:
-        logger.error(f"Error cleaning up orphaned configurations: {e}")
-        return 0
+    return {"deleted": deleted_count, "elapsed_ms": elapsed_ms}
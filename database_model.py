@@ -1,9 +1,56 @@
 from peewee import *
+from array import array
 import datetime
+import json
+import sys
 
 # We will initialize the database proxy here, but bind it later in database_manager
 db = Proxy()
 
+class TeethField(BlobField):
+    """Teeth counts stored compactly as little-endian unsigned 16-bit integers.
+
+    Reads always return a list of ints. Legacy rows holding a JSON or
+    comma-separated string are still understood until they are rewritten.
+    """
+    TYPECODE = "H"
+
+    def db_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return super().db_value(value)
+        try:
+            packed = array(self.TYPECODE, self.to_list(value))
+        except OverflowError:
+            raise ValueError("Teeth values must be between 0 and 65535.")
+        if sys.byteorder == "big":
+            packed.byteswap()
+        return super().db_value(packed.tobytes())
+
+    def python_value(self, value):
+        if value is None:
+            return None
+        return self.to_list(value)
+
+    @classmethod
+    def to_list(cls, value):
+        """Convert stored bytes, a legacy JSON/comma-separated string, or a list to a list of ints."""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            unpacked = array(cls.TYPECODE)
+            unpacked.frombytes(bytes(value))
+            if sys.byteorder == "big":
+                unpacked.byteswap()
+            return unpacked.tolist()
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                value = value.split(',')
+            if not isinstance(value, list):
+                value = [value]
+        return [int(t) for t in value]
+
 class BaseModel(Model):
     class Meta:
         database = db
@@ -11,18 +58,22 @@ class BaseModel(Model):
 class Component(BaseModel):
     id = CharField(primary_key=True)
     name = CharField()
-    type = CharField() # Chainring or Cassette
+    type = CharField(index=True) # Chainring or Cassette
     speed = IntegerField(null=True) # e.g. 11 for 11-speed
-    teeth = TextField() # JSON string or comma-separated list of teeth
+    teeth = TeethField() # List of teeth, stored as packed uint16
+    teeth_min = IntegerField(null=True) # Precomputed from teeth, see database_manager.teeth_stats
+    teeth_max = IntegerField(null=True)
+    teeth_count = IntegerField(null=True)
     comments = TextField(null=True)
 
 class GearConfiguration(BaseModel):
     id = CharField(primary_key=True)
     name = CharField()
-    front_component_id = ForeignKeyField(Component, backref='front_configs')
-    rear_component_id = ForeignKeyField(Component, backref='rear_configs')
+    front_component_id = ForeignKeyField(Component, backref='front_configs', index=True)
+    rear_component_id = ForeignKeyField(Component, backref='rear_configs', index=True)
     comments = TextField(null=True)
-    created_at = DateTimeField(default=datetime.datetime.now)
+    total_range = IntegerField(null=True) # Precomputed total range %, kept in sync by business_logic
+    created_at = DateTimeField(default=datetime.datetime.now, index=True)
 
 class UserPreference(BaseModel):
     """User preferences for gear ratio color coding.
@@ -33,3 +84,12 @@ class UserPreference(BaseModel):
     id = AutoField(primary_key=True)
     min_ratio = FloatField(default=0.8)
     max_ratio = FloatField(default=3.2)
+
+class DataVersion(BaseModel):
+    """Write counter for one kind of data, shared by every process using the database.
+
+    database_manager bumps the row on each write; processes compare it with the
+    value they last saw to know when their in-memory caches are stale.
+    """
+    kind = CharField(primary_key=True) # components, configurations, preferences, or epoch (see database_manager.EPOCH_KIND)
+    version = IntegerField(default=0)
@@ -0,0 +1,139 @@
+"""Online backup of the SQLite database while the app keeps serving.
+
+Uses SQLite's backup API, copying a limited number of pages per step and
+releasing the source between steps, so it is never locked for long and the app
+keeps reading and writing during the copy. If the app writes while a copy
+is in progress, SQLite restarts the copy so the backup is still a
+consistent snapshot. The copy is written to a temporary file next to the
+destination, checked, and then renamed over it, so the destination is
+always either the previous backup or a complete new one.
+
+Usage:
+    python db_backup.py                                  # to BACKUP_PATH
+    python db_backup.py --output /backups/gear_calc.db --pages 512
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import database_manager
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PATH = os.getenv(
+    "BACKUP_PATH",
+    os.path.join(os.path.dirname(database_manager.DATABASE_PATH), "backup", "gear_calc.db")
+)
+# Pages copied per backup step, and the wait before retrying a step that found the database busy
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "1024"))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.01"))
+
+# Only one backup runs at a time per process
+_backup_lock = threading.Lock()
+
+class BackupInProgress(Exception):
+    """Raised when a backup is requested while another one is still running."""
+
+def backup_database(destination=None, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP):
+    """
+    Copy the live database to destination (default BACKUP_PATH) and atomically replace it.
+    Returns a dict with the path, size in bytes, page count, step count and elapsed milliseconds.
+    Raises BackupInProgress if another backup is running, or sqlite3.Error if the copy fails its check.
+    """
+    destination = os.path.abspath(destination or BACKUP_PATH)
+    if not _backup_lock.acquire(blocking=False):
+        raise BackupInProgress("A backup is already running.")
+
+    try:
+        started = time.perf_counter()
+        directory = os.path.dirname(destination)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".gear_calc-", suffix=".db.tmp", dir=directory)
+        os.close(fd)
+
+        steps = {"count": 0, "pages": 0}
+
+        def progress(status, remaining, total):
+            steps["count"] += 1
+            steps["pages"] = total
+
+        try:
+            source = sqlite3.connect(
+                database_manager.DATABASE_PATH,
+                timeout=database_manager.SQLITE_PRAGMAS["busy_timeout"] / 1000
+            )
+            try:
+                target = sqlite3.connect(temp_path)
+                try:
+                    source.backup(target, pages=pages, progress=progress, sleep=sleep)
+                    # The copy is a standalone file: no WAL, and checked before it replaces the old backup
+                    target.execute("PRAGMA journal_mode = DELETE")
+                    result = target.execute("PRAGMA quick_check").fetchone()[0]
+                    if result != "ok":
+                        raise sqlite3.DatabaseError(f"Backup failed quick_check: {result}")
+                finally:
+                    target.close()
+            finally:
+                source.close()
+
+            with open(temp_path, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(temp_path, destination)
+            _fsync_directory(directory)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        size = os.path.getsize(destination)
+        logger.info(f"Backed up database to {destination} ({size} bytes, {steps['count']} steps) in {elapsed_ms} ms")
+        return {
+            "path": destination,
+            "bytes": size,
+            "pages": steps["pages"],
+            "steps": steps["count"],
+            "elapsed_ms": elapsed_ms
+        }
+    finally:
+        _backup_lock.release()
+
+def _fsync_directory(directory):
+    """Persist the rename itself. Not supported on every platform, so failures are ignored."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Back up the Gear Calc database without stopping the app.")
+    parser.add_argument("--output", default=BACKUP_PATH, help="Backup file (default: %(default)s)")
+    parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP,
+                        help="Pages copied per step; -1 copies everything in one step (default: %(default)s)")
+    parser.add_argument("--sleep", type=float, default=BACKUP_STEP_SLEEP,
+                        help="Seconds to wait before retrying when the database is busy (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+    if not os.path.exists(database_manager.DATABASE_PATH):
+        print(f"No database at {database_manager.DATABASE_PATH}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(backup_database(args.output, pages=args.pages, sleep=args.sleep), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,465 @@
+"""Array-backed gear calculations.
+
+All front x rear ratios are computed as NumPy matrices in a single pass.
+Each chainring's row is then kept as a GearTable: a slotted object holding
+compact parallel arrays (rear teeth, ratios, steps, status codes) rather
+than one dict per gear. Per-gear Gear objects and plain dicts are only
+created when a table is iterated or serialized. The same matrix layout
+backs the metrics tables (development, gain ratio and speed at cadence)
+and the overlap analysis.
+"""
+
+from array import array
+
+import numpy as np
+
+WARNING_BUFFER_FRACTION = 0.1  # 10% of the preferred range on each side
+
+# Defaults for the metrics tables: a 700x25c road wheel and a mid-size crank
+DEFAULT_WHEEL_CIRCUMFERENCE_MM = 2105
+DEFAULT_CRANK_LENGTH_MM = 172.5
+DEFAULT_CADENCES = (60, 70, 80, 90, 100, 110)
+
+# Overlap analysis: gears within this many percent of each other count as duplicates
+DEFAULT_OVERLAP_TOLERANCE_PCT = 3.0
+# Multi-ring combinations whose chainring and cog positions differ by more than this are cross-chained
+MAX_CHAINLINE_OFFSET = 0.75
+# Cost of a front shift in the shift sequence, in the units of its step cost (squared log ratio
+# steps): about the same as one extra 15% step
+FRONT_SHIFT_COST = 0.02
+
+STATUS_LABELS = ("normal", "poor", "warning", "optimal")
+STATUS_NORMAL, STATUS_POOR, STATUS_WARNING, STATUS_OPTIMAL = range(len(STATUS_LABELS))
+
+
+def _round(values, decimals):
+    """
+    Round like Python's round() rather than np.round().
+    np.round scales by 10**decimals first, which can push values that sit just
+    below a .5 tie over it, so near-ties are re-rounded exactly.
+    """
+    rounded = np.round(values, decimals)
+    scaled = values * 10 ** decimals
+    with np.errstate(invalid="ignore"):
+        near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, decimals) for v in values[near_tie].tolist()]
+    return rounded
+
+
+def _pad(rows, descending=False):
+    """Stack ragged teeth lists into a float matrix padded with NaN."""
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        if len(row):
+            values = np.asarray(row, dtype=np.float64)
+            matrix[i, :len(values)] = -np.sort(-values) if descending else values
+    return matrix
+
+
+def ratio_matrix(front, rear):
+    """
+    Ratios for every chainring/cog combination, rounded to 3 decimals.
+    Broadcasts front (..., F) against rear (..., R) into (..., F, R).
+    """
+    return _round(front[..., :, None] / rear[..., None, :], 3)
+
+
+def step_percentages(ratios):
+    """Percentage change from the previous gear along the last axis (NaN for the first gear)."""
+    steps = np.full(ratios.shape, np.nan)
+    previous = ratios[..., :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steps[..., 1:] = _round(((ratios[..., 1:] - previous) / previous) * 100, 1)
+    return steps
+
+
+def status_codes(ratios, preferences=None):
+    """Classify ratios against the preferred range. Returns an int8 array of STATUS_* codes."""
+    if not preferences:
+        return np.full(ratios.shape, STATUS_NORMAL, dtype=np.int8)
+
+    min_r = preferences.min_ratio
+    max_r = preferences.max_ratio
+    warning_buffer = (max_r - min_r) * WARNING_BUFFER_FRACTION
+
+    codes = np.full(ratios.shape, STATUS_OPTIMAL, dtype=np.int8)
+    codes[(ratios < min_r + warning_buffer) | (ratios > max_r - warning_buffer)] = STATUS_WARNING
+    codes[(ratios < min_r) | (ratios > max_r)] = STATUS_POOR
+    return codes
+
+
+def ring_ranges(front, rear):
+    """Total range per chainring, computed exactly like calculate_total_range_value([front], rear)."""
+    padding = np.isnan(rear)
+    min_rear = np.where(padding, np.inf, rear).min(axis=-1, initial=np.inf)
+    max_rear = np.where(padding, -np.inf, rear).max(axis=-1, initial=-np.inf)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        max_ratio = front / min_rear[..., None]
+        min_ratio = front / max_rear[..., None]
+        return np.rint((max_ratio / min_ratio) * 100)
+
+
+class Gear:
+    """One gear of a GearTable. Created on demand when a table is iterated."""
+    __slots__ = ("gear_num", "rear_tooth", "ratio", "change_pct", "status")
+
+    def __init__(self, gear_num, rear_tooth, ratio, change_pct, status):
+        self.gear_num = gear_num
+        self.rear_tooth = rear_tooth
+        self.ratio = ratio
+        self.change_pct = change_pct  # None for the first gear
+        self.status = status          # one of STATUS_LABELS
+
+    def to_dict(self):
+        return {
+            "rear_tooth": self.rear_tooth,
+            "ratio": self.ratio,
+            "gear_num": self.gear_num,
+            "change_pct": self.change_pct,
+            "status": self.status
+        }
+
+
+class GearTable:
+    """
+    Gear table for one chainring, stored as parallel arrays ordered from the largest cog.
+    Iterating (or .gears) yields Gear objects; to_dict() gives the JSON form,
+    {"front_tooth", "total_range", "gears": [{"rear_tooth", "ratio", "gear_num", "change_pct", "status"}, ...]}.
+    Tables are shared by the gear table cache and must not be modified.
+    """
+    __slots__ = ("front_tooth", "total_range", "rear_teeth", "ratios", "change_pcts", "status_codes")
+
+    def __init__(self, front_tooth, total_range, rear_teeth, ratios, change_pcts, status_codes):
+        self.front_tooth = front_tooth
+        self.total_range = total_range
+        self.rear_teeth = rear_teeth      # array("H"), shared by the tables of one pair
+        self.ratios = ratios              # array("d")
+        self.change_pcts = change_pcts    # array("d"); the first entry is unused
+        self.status_codes = status_codes  # bytes of STATUS_* codes
+
+    def __len__(self):
+        return len(self.ratios)
+
+    def rows(self):
+        """(gear_num, rear_tooth, ratio, change_pct, status) tuples, without creating Gear objects."""
+        change = list(self.change_pcts)
+        if change:
+            change[0] = None
+        return zip(
+            range(1, len(self.ratios) + 1), self.rear_teeth, self.ratios, change,
+            [STATUS_LABELS[code] for code in self.status_codes]
+        )
+
+    def __iter__(self):
+        return (Gear(*row) for row in self.rows())
+
+    @property
+    def gears(self):
+        return list(self)
+
+    def to_dict(self):
+        return {
+            "front_tooth": self.front_tooth,
+            "total_range": self.total_range,
+            "gears": [
+                {"rear_tooth": rear, "ratio": ratio, "gear_num": num, "change_pct": pct, "status": status}
+                for num, rear, ratio, pct, status in self.rows()
+            ]
+        }
+
+    def __repr__(self):
+        return f"<GearTable {self.front_tooth}T, {len(self)} gears>"
+
+
+def tables_to_dicts(tables):
+    """JSON form of a list of GearTables."""
+    return [table.to_dict() for table in tables]
+
+
+def _build_tables(front_row, rear_row, ratios, steps, codes, ranges):
+    """Copy one pair's arrays into a GearTable per chainring."""
+    rear_teeth = array("H", rear_row.astype(np.uint16).tobytes())
+    tables = []
+
+    for f, front in enumerate(front_row):
+        if rear_teeth:
+            total_range = int(ranges[f])
+        else:
+            total_range = 0
+
+        tables.append(GearTable(
+            front,
+            total_range,
+            rear_teeth,
+            array("d", ratios[f].tobytes()),
+            array("d", steps[f].tobytes()),
+            codes[f].astype(np.uint8).tobytes()
+        ))
+
+    return tables
+
+
+def calculate_gear_tables_batch(pairs, preferences=None):
+    """
+    Calculate gear tables for many (front_teeth, rear_teeth) pairs at once.
+    Every pair is padded into one (pairs x chainrings x cogs) array so ratios,
+    steps and statuses are computed in a single vectorized pass.
+    Returns one list of GearTables (one per chainring) per input pair, in input order.
+    """
+    pairs = [(list(front), list(rear)) for front, rear in pairs]
+    if not pairs:
+        return []
+
+    front = _pad([f for f, _ in pairs])
+    rear = _pad([r for _, r in pairs], descending=True)
+
+    ratios = ratio_matrix(front, rear)
+    steps = step_percentages(ratios)
+    codes = status_codes(ratios, preferences)
+    ranges = ring_ranges(front, rear)
+
+    results = []
+    for p, (front_teeth, rear_teeth) in enumerate(pairs):
+        n_front, n_rear = len(front_teeth), len(rear_teeth)
+        results.append(_build_tables(
+            front_teeth,
+            rear[p, :n_rear],
+            ratios[p, :n_front, :n_rear],
+            steps[p, :n_front, :n_rear],
+            codes[p, :n_front, :n_rear],
+            ranges[p, :n_front]
+        ))
+
+    return results
+
+
+def calculate_gear_tables(front_teeth, rear_teeth, preferences=None):
+    """Calculate the gear tables for a single chainring/cassette pair."""
+    return calculate_gear_tables_batch([(front_teeth, rear_teeth)], preferences)[0]
+
+
+def development_metres(ratios, circumference_mm):
+    """Distance travelled per crank revolution, in metres."""
+    return ratios * (circumference_mm / 1000)
+
+
+def gain_ratios(ratios, circumference_mm, crank_length_mm):
+    """Sheldon Brown's gain ratio: wheel radius over crank length, times the gear ratio."""
+    return ratios * (circumference_mm / (2 * np.pi) / crank_length_mm)
+
+
+def speed_kmh(development, cadences):
+    """Speed for every gear at every cadence (rpm), as a new trailing axis."""
+    return development[..., None] * (np.asarray(cadences, dtype=np.float64) * 60 / 1000)
+
+
+def _build_metrics(front_row, rear_row, development, gains, speeds):
+    """Convert one pair's metric arrays into per-chainring dicts, gears ordered like the gear tables."""
+    rear_list = [int(r) for r in rear_row]
+    tables = []
+    for f, front in enumerate(front_row):
+        tables.append({
+            "front_tooth": front,
+            "gears": [
+                {"rear_tooth": rear, "gear_num": num, "development": dev, "gain_ratio": gain, "speeds": speed}
+                for num, (rear, dev, gain, speed) in enumerate(
+                    zip(rear_list, development[f].tolist(), gains[f].tolist(), speeds[f].tolist()), start=1
+                )
+            ]
+        })
+    return tables
+
+
+def calculate_gear_metrics_batch(pairs, circumference_mm=DEFAULT_WHEEL_CIRCUMFERENCE_MM,
+                                 crank_length_mm=DEFAULT_CRANK_LENGTH_MM, cadences=DEFAULT_CADENCES):
+    """
+    Development (m), gain ratio and speed (km/h) at each cadence for many (front_teeth, rear_teeth) pairs.
+    Like calculate_gear_tables_batch, every pair is padded into one array and each metric is a single
+    vectorized expression; speeds add a cadence axis (pairs x chainrings x cogs x cadences).
+    Metrics use unrounded ratios. Returns one list of chainring tables per input pair, in input order.
+    """
+    pairs = [(list(front), list(rear)) for front, rear in pairs]
+    if not pairs:
+        return []
+
+    front = _pad([f for f, _ in pairs])
+    rear = _pad([r for _, r in pairs], descending=True)
+
+    ratios = front[..., :, None] / rear[..., None, :]
+    development = development_metres(ratios, circumference_mm)
+    gains = _round(gain_ratios(ratios, circumference_mm, crank_length_mm), 2)
+    speeds = _round(speed_kmh(development, cadences), 1)
+    development = _round(development, 2)
+
+    results = []
+    for p, (front_teeth, rear_teeth) in enumerate(pairs):
+        n_front, n_rear = len(front_teeth), len(rear_teeth)
+        results.append(_build_metrics(
+            front_teeth,
+            rear[p, :n_rear],
+            development[p, :n_front, :n_rear],
+            gains[p, :n_front, :n_rear],
+            speeds[p, :n_front, :n_rear]
+        ))
+
+    return results
+
+
+def chainline_offsets(front, rear):
+    """
+    How far each combination is from a straight chain, from 0 (straight) to 1 (fully crossed).
+    Chainrings are positioned from smallest (0) to largest (1) and cogs from largest (0) to
+    smallest (1); single-ring and single-cog setups are always 0. front (..., F) ascending, rear (..., R)
+    descending, both NaN-padded. Returns (..., F, R).
+    """
+    n_front = np.sum(~np.isnan(front), axis=-1)[..., None]
+    n_rear = np.sum(~np.isnan(rear), axis=-1)[..., None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        front_pos = np.where(n_front > 1, np.arange(front.shape[-1]) / (n_front - 1), 0.0)
+        rear_pos = np.where(n_rear > 1, np.arange(rear.shape[-1]) / (n_rear - 1), 0.0)
+    offsets = np.abs(front_pos[..., :, None] - rear_pos[..., None, :])
+    return np.where((n_front > 1)[..., None] & (n_rear > 1)[..., None], offsets, 0.0)
+
+
+def _group_starts(sorted_ratios, tolerance_pct):
+    """Indexes of the gears that start a group: those more than tolerance_pct above the group's first gear."""
+    starts = []
+    anchor = None
+    for i, ratio in enumerate(sorted_ratios):
+        if anchor is None or (ratio - anchor) / anchor * 100 > tolerance_pct:
+            starts.append(i)
+            anchor = ratio
+    return np.asarray(starts, dtype=np.int64)
+
+
+def _shift_paths(log_ratios, rings, cogs, group_ids, counts, front_shift_cost=FRONT_SHIFT_COST):
+    """
+    Shift sequence through each pair's usable gears, as indexes into its ratio-sorted gears.
+
+    Inputs are (pairs x gears) arrays in ascending ratio order, padded past counts. A sequence starts
+    at the lowest gear and climbs to the highest reachable one. Each step either moves one cog down
+    the cassette on the same chainring, or shifts to a bigger chainring (with any compensating rear
+    shift) landing in a higher duplicate group. The sequence with the lowest total cost is taken:
+    the squared log ratio of every step, which is smallest when the steps are even, plus
+    front_shift_cost for each front shift. Sequences therefore stay on a ring and cross over at a
+    few points. The cost is computed for all pairs together, one gear position at a time.
+    """
+    n_pairs, n_gears = log_ratios.shape
+    if n_gears == 0:
+        return [[] for _ in range(n_pairs)]
+    usable = np.arange(n_gears) < counts[:, None]
+    cost = np.full((n_pairs, n_gears), np.inf)
+    cost[:, 0] = np.where(counts > 0, 0.0, np.inf)
+    previous = np.full((n_pairs, n_gears), -1, dtype=np.int64)
+
+    for j in range(1, n_gears):
+        before = slice(0, j)
+        rear_shift = (rings[:, before] == rings[:, j, None]) & (cogs[:, before] == cogs[:, j, None] - 1)
+        front_shift = (rings[:, before] < rings[:, j, None]) & (group_ids[:, before] < group_ids[:, j, None])
+        with np.errstate(invalid="ignore"):
+            steps = log_ratios[:, j, None] - log_ratios[:, before]
+            candidates = cost[:, before] + steps * steps + np.where(front_shift, front_shift_cost, 0.0)
+        candidates = np.where((rear_shift | front_shift) & usable[:, before], candidates, np.inf)
+        best = np.argmin(candidates, axis=1)
+        best_cost = np.take_along_axis(candidates, best[:, None], axis=1)[:, 0]
+        reachable = usable[:, j] & np.isfinite(best_cost)
+        cost[:, j] = np.where(reachable, best_cost, np.inf)
+        previous[:, j] = np.where(reachable, best, -1)
+
+    paths = []
+    for p in range(n_pairs):
+        reached = np.flatnonzero(np.isfinite(cost[p]))
+        path = []
+        i = int(reached[-1]) if len(reached) else -1
+        while i >= 0:
+            path.append(i)
+            i = int(previous[p, i])
+        paths.append(path[::-1])
+    return paths
+
+
+def analyze_overlap_batch(pairs, tolerance_pct=DEFAULT_OVERLAP_TOLERANCE_PCT, max_chainline_offset=MAX_CHAINLINE_OFFSET):
+    """
+    Merge every chainring x cog ratio of each (front_teeth, rear_teeth) pair and analyse the overlap.
+
+    Usable (not cross-chained) gears are sorted by ratio once and grouped in a single pass: a gear
+    within tolerance_pct of the first (lowest) gear of the current group joins it, otherwise it
+    starts a new group. A group therefore never spans more than tolerance_pct, however densely
+    spaced the gears are. Each group is one unique gear. The shift sequence is the one a rider
+    would use from the lowest to the highest gear, see _shift_paths. Ratios, chainlines, the sort
+    and the shift sequences are computed for all pairs together in padded (pairs x gears) arrays.
+    """
+    pairs = [(sorted(front), list(rear)) for front, rear in pairs]
+    if not pairs:
+        return []
+
+    front = _pad([f for f, _ in pairs])
+    rear = _pad([r for _, r in pairs], descending=True)
+    n_pairs, n_front, n_rear = len(pairs), front.shape[-1], rear.shape[-1]
+
+    ratios = front[:, :, None] / rear[:, None, :]
+    usable = ~np.isnan(ratios) & (chainline_offsets(front, rear) <= max_chainline_offset + 1e-9)
+
+    # Flatten to (pairs, gears) and sort the usable gears by ratio; padding and cross-chained gears sort last
+    flat_ratios = np.where(usable, ratios, np.nan).reshape(n_pairs, -1)
+    order = np.argsort(flat_ratios, axis=1, kind="stable")
+    sorted_ratios = np.take_along_axis(flat_ratios, order, axis=1)
+    rings, cogs = order // n_rear, order % n_rear
+    counts = usable.reshape(n_pairs, -1).sum(axis=1)
+
+    group_starts = []
+    group_ids = np.zeros(sorted_ratios.shape, dtype=np.int64)
+    for p in range(n_pairs):
+        starts = _group_starts(sorted_ratios[p, :counts[p]].tolist(), tolerance_pct)
+        group_starts.append(starts)
+        group_ids[p, starts[1:]] = 1
+    group_ids = np.cumsum(group_ids, axis=1)
+    with np.errstate(invalid="ignore"):
+        paths = _shift_paths(np.log(sorted_ratios), rings, cogs, group_ids, counts)
+
+    results = []
+    for p, (front_teeth, rear_teeth) in enumerate(pairs):
+        count = int(counts[p])
+        fronts = front[p].take(rings[p, :count]).astype(int).tolist()
+        rears = rear[p].take(cogs[p, :count]).astype(int).tolist()
+        gear_ratios = _round(sorted_ratios[p, :count], 3).tolist()
+        starts = group_starts[p]
+
+        duplicates = []
+        bounds = np.append(starts, count)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if stop - start > 1:
+                duplicates.append([
+                    {"front_tooth": fronts[i], "rear_tooth": rears[i], "ratio": gear_ratios[i]}
+                    for i in range(start, stop)
+                ])
+
+        sequence = []
+        previous = None
+        for i in paths[p]:
+            change = None
+            if previous is not None:
+                change = round((gear_ratios[i] - previous) / previous * 100, 1)
+            sequence.append({
+                "front_tooth": fronts[i],
+                "rear_tooth": rears[i],
+                "ratio": gear_ratios[i],
+                "change_pct": change
+            })
+            previous = gear_ratios[i]
+
+        steps = [gear["change_pct"] for gear in sequence[1:]]
+        results.append({
+            "total_gears": len(front_teeth) * len(rear_teeth),
+            "usable_gears": count,
+            "cross_chained": len(front_teeth) * len(rear_teeth) - count,
+            "unique_gears": len(starts),
+            "duplicates": duplicates,
+            "shift_sequence": sequence,
+            "front_shifts": sum(1 for a, b in zip(sequence, sequence[1:]) if a["front_tooth"] != b["front_tooth"]),
+            "max_step_pct": max(steps) if steps else None
+        })
+
+    return results
@@ -1,42 +1,198 @@
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, Form, HTTPException, UploadFile, File, Response, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from typing import List, Optional
 import business_logic
+import component_io
+import configuration_io
 import database_manager
+import db_backup
+import metrics
+import asyncio
+import csv
 import logging
+import os
+import time
 from seed_data import seed_database
+from utils import make_etag, etag_matches
 import uvicorn
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+app.add_middleware(database_manager.DataVersionMiddleware)
+# Added last so it is outermost and also counts the data version check
+app.add_middleware(metrics.MetricsMiddleware)
+
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "86400"))
+
+class CachedStaticFiles(StaticFiles):
+    """Static files served with a Cache-Control header, so browsers and proxies can reuse them."""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        response.headers.setdefault("Cache-Control", f"public, max-age={STATIC_MAX_AGE}")
+        return response
 
 # Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Setup templates
 templates = Jinja2Templates(directory="templates")
 
+# Pages whose ETag is derived from data versions may be stored, but must be revalidated on every use
+REVALIDATE_HEADERS = {"Cache-Control": "no-cache"}
+
+def not_modified(request, etag, match_any=True):
+    """
+    Return a 304 response if the request's If-None-Match matches etag, else None.
+    Pass match_any=False before the resource is known to exist, so "*" does not match a missing one.
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag, match_any):
+        return Response(status_code=304, headers={"ETag": etag, **REVALIDATE_HEADERS})
+    return None
+
+def render_template(name, context):
+    """Render a template response, recording the render time in metrics."""
+    started = time.perf_counter()
+    response = templates.TemplateResponse(name, context)
+    metrics.record_render(name, time.perf_counter() - started)
+    return response
+
+# References to running background tasks, so they are not garbage collected mid-run
+_background_tasks = set()
+
+def _run_in_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def _timed_phase(timings, phase, func, *args, **kwargs):
+    """Run func, recording its duration under phase in timings and in the startup metrics."""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - started
+    timings[phase] = elapsed
+    metrics.startup_duration.set(elapsed, phase)
+    return result
+
+def _format_timings(timings):
+    return ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in timings.items())
+
+def _deferred_maintenance():
+    """
+    Work that can wait until the app is serving: loading the in-memory read model (when enabled),
+    backfilling stored ranges and removing orphans.
+    """
+    timings = {}
+    with database_manager.connection():
+        if database_manager.IN_MEMORY_READS:
+            _timed_phase(timings, "read_model", database_manager.load_read_model)
+        _timed_phase(timings, "refresh_ranges", lambda: business_logic.refresh_configuration_ranges(only_missing=True))
+        report = _timed_phase(timings, "orphan_cleanup", database_manager.cleanup_orphaned_configurations)
+    logger.info(f"Deferred maintenance finished ({_format_timings(timings)}); {report['deleted']} orphaned configuration(s) deleted")
+
+async def _run_deferred_maintenance():
+    try:
+        await database_manager.run_sync(_deferred_maintenance)
+    except Exception as e:
+        logger.error(f"Deferred maintenance failed: {e}")
+
 @app.on_event("startup")
-def startup_event():
-    """Initialize database on startup."""
+async def startup_event():
+    """Initialize database on startup. Anything not needed to serve requests runs afterwards in the background."""
+    started = time.perf_counter()
+    timings = {}
     logger.info("Initializing database...")
-    database_manager.initialize_db()
-    seed_database()
-    database_manager.cleanup_orphaned_configurations()
-    logger.info("Application ready")
+    _timed_phase(timings, "initialize_db", database_manager.initialize_db, new_epoch=True)
+    with database_manager.connection():
+        _timed_phase(timings, "seed", seed_database)
+    _run_in_background(_run_deferred_maintenance())
+    total = time.perf_counter() - started
+    metrics.startup_duration.set(total, "total")
+    logger.info(f"Application ready in {total * 1000:.1f} ms ({_format_timings(timings)})")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    database_manager.close_db()
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
-    configs = business_logic.get_landing_page_data()
-    return templates.TemplateResponse("index.html", {"request": request, "configs": configs})
+async def read_root(
+    request: Request,
+    q: Optional[str] = None,
+    sort: str = "created",
+    order: str = "desc",
+    after: Optional[str] = None
+):
+    try:
+        page = await database_manager.run_sync(
+            business_logic.get_landing_page_data, after=after, sort=sort, order=order, search=q
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return render_template("index.html", {
+        "request": request,
+        "configs": page["configs"],
+        "search": q or "",
+        "sort": sort,
+        "order": order,
+        "next_url": _page_url(request, "after", page["next_cursor"])
+    })
+
+def _page_url(request, param, cursor):
+    """URL of the next page: the current URL with the cursor parameter replaced, or None on the last page."""
+    if not cursor:
+        return None
+    return str(request.url.include_query_params(**{param: cursor}))
+
+@app.get("/api/configurations")
+async def list_configurations(
+    limit: int = business_logic.PAGE_SIZE,
+    after: Optional[str] = None,
+    sort: str = "created",
+    order: str = "desc",
+    q: Optional[str] = None,
+    component_id: Optional[str] = None,
+    min_range: Optional[int] = None,
+    max_range: Optional[int] = None
+):
+    try:
+        page = await database_manager.run_sync(
+            business_logic.get_landing_page_data,
+            limit=limit, after=after, sort=sort, order=order, search=q,
+            component_id=component_id, min_range=min_range, max_range=max_range
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": page["configs"], "next": page["next_cursor"]}
+
+@app.get("/api/components")
+async def list_components(
+    type: Optional[str] = None,
+    limit: int = business_logic.PAGE_SIZE,
+    after: Optional[str] = None,
+    q: Optional[str] = None,
+    min_teeth: Optional[int] = None,
+    max_teeth: Optional[int] = None
+):
+    try:
+        page = await database_manager.run_sync(
+            business_logic.get_components_page,
+            component_type=type, after=after, search=q, limit=limit, min_teeth=min_teeth, max_teeth=max_teeth
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "items": [business_logic.component_to_dict(comp) for comp in page["components"]],
+        "next": page["next_cursor"]
+    }
 
 @app.get("/calculator", response_class=HTMLResponse)
 async def calculator_page(request: Request):
-    chainrings = business_logic.get_component_options("Chainring")
-    cassettes = business_logic.get_component_options("Cassette")
-    return templates.TemplateResponse("gear_ratio.html", {
+    chainrings = await database_manager.run_sync(business_logic.get_component_options, "Chainring")
+    cassettes = await database_manager.run_sync(business_logic.get_component_options, "Cassette")
+    return render_template("gear_ratio.html", {
         "request": request, 
         "chainrings": chainrings, 
         "cassettes": cassettes,
@@ -45,27 +201,40 @@ async def calculator_page(request: Request):
 
 @app.get("/preferences", response_class=HTMLResponse)
 async def get_preferences(request: Request):
-    prefs = database_manager.get_user_preferences()
-    return templates.TemplateResponse("preferences.html", {"request": request, "preferences": prefs})
+    prefs = await database_manager.run_sync(database_manager.get_user_preferences)
+    return render_template("preferences.html", {"request": request, "preferences": prefs})
 
 @app.post("/preferences")
 async def save_preferences(
     min_ratio: float = Form(...),
     max_ratio: float = Form(...)
 ):
-    database_manager.update_user_preferences(min_ratio, max_ratio)
+    await database_manager.run_sync(business_logic.update_user_preferences, min_ratio, max_ratio)
     return RedirectResponse(url="/?msg=Preferences saved successfully", status_code=303)
 
 @app.get("/calculator/{config_id}", response_class=HTMLResponse)
 async def calculator_detail(request: Request, config_id: str):
-    details = business_logic.get_configuration_details(config_id)
+    # The page shows the configuration, the full component dropdowns and preference colours
+    etag = make_etag(
+        "calculator", config_id,
+        database_manager.get_data_version("components", "configurations", "preferences")
+    )
+    # Only an exact match skips loading the configuration; "*" needs it to exist
+    cached = not_modified(request, etag, match_any=False)
+    if cached:
+        return cached
+
+    details = await database_manager.run_sync(business_logic.get_configuration_details, config_id)
     if not details:
         raise HTTPException(status_code=404, detail="Configuration not found")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
-    chainrings = business_logic.get_component_options("Chainring")
-    cassettes = business_logic.get_component_options("Cassette")
+    chainrings = await database_manager.run_sync(business_logic.get_component_options, "Chainring")
+    cassettes = await database_manager.run_sync(business_logic.get_component_options, "Cassette")
     
-    return templates.TemplateResponse("gear_ratio.html", {
+    response = render_template("gear_ratio.html", {
         "request": request,
         "chainrings": chainrings,
         "cassettes": cassettes,
@@ -75,6 +244,33 @@ async def calculator_detail(request: Request, config_id: str):
         "gear_tables": details["gear_tables"],
         "total_range": details["total_range"]
     })
+    response.headers.update({"ETag": etag, **REVALIDATE_HEADERS})
+    return response
+
+async def _render_preview(request, front_component_id, rear_component_id):
+    etag = make_etag(
+        "preview", front_component_id, rear_component_id,
+        database_manager.get_data_version("components", "preferences")
+    )
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    gear_tables = await database_manager.run_sync(business_logic.calculate_from_components, front_component_id, rear_component_id)
+    response = render_template("partials/calculation_results.html", {
+        "request": request,
+        "gear_tables": gear_tables
+    })
+    response.headers.update({"ETag": etag, **REVALIDATE_HEADERS})
+    return response
+
+@app.get("/calculate-preview", response_class=HTMLResponse)
+async def calculate_preview_get(
+    request: Request,
+    front_component_id: str,
+    rear_component_id: str
+):
+    return await _render_preview(request, front_component_id, rear_component_id)
 
 @app.post("/calculate-preview", response_class=HTMLResponse)
 async def calculate_preview(
@@ -82,11 +278,7 @@ async def calculate_preview(
     front_component_id: str = Form(...),
     rear_component_id: str = Form(...)
 ):
-    gear_tables = business_logic.calculate_from_components(front_component_id, rear_component_id)
-    return templates.TemplateResponse("partials/calculation_results.html", {
-        "request": request,
-        "gear_tables": gear_tables
-    })
+    return await _render_preview(request, front_component_id, rear_component_id)
 
 @app.post("/calculator")
 async def save_configuration(
@@ -98,10 +290,10 @@ async def save_configuration(
 ):
     try:
         if config_id:
-            business_logic.update_configuration(config_id, name, front_component_id, rear_component_id, comments)
+            await database_manager.run_sync(business_logic.update_configuration, config_id, name, front_component_id, rear_component_id, comments)
             msg = "Configuration updated successfully"
         else:
-            business_logic.create_configuration(name, front_component_id, rear_component_id, comments)
+            await database_manager.run_sync(business_logic.create_configuration, name, front_component_id, rear_component_id, comments)
             msg = "Configuration created successfully"
         return RedirectResponse(url=f"/?msg={msg}", status_code=303)
     except Exception as e:
@@ -111,35 +303,172 @@ async def save_configuration(
 @app.delete("/calculator/{config_id}")
 async def delete_configuration(config_id: str):
     try:
-        business_logic.delete_configuration(config_id)
+        await database_manager.run_sync(business_logic.delete_configuration, config_id)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Error deleting configuration: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-@app.get("/components", response_class=HTMLResponse)
-async def components_page(request: Request):
-    chainrings = business_logic.get_components_by_type("Chainring")
-    cassettes = business_logic.get_components_by_type("Cassette")
-    return templates.TemplateResponse("components.html", {
+@app.get("/api/ratios")
+async def ratios_between(min: float, max: float, limit: int = business_logic.PAGE_SIZE):
+    try:
+        return await database_manager.run_sync(business_logic.find_ratios_between, min, max, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/ratios/nearest")
+async def ratios_nearest(ratio: float, k: int = 10):
+    try:
+        items = await database_manager.run_sync(business_logic.find_nearest_ratios, ratio, k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items}
+
+async def _json_body(request):
+    """Parse a batch request body: a JSON object with a configuration_ids list."""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be JSON.")
+    if not isinstance(body, dict) or not isinstance(body.get("configuration_ids"), list):
+        raise HTTPException(status_code=400, detail="configuration_ids must be a list.")
+    return body
+
+@app.get("/api/metrics")
+async def gear_metrics(
+    front_component_id: str,
+    rear_component_id: str,
+    wheel_circumference: Optional[float] = None,
+    crank_length: Optional[float] = None,
+    cadence: Optional[List[float]] = Query(None)
+):
+    try:
+        result = await database_manager.run_sync(
+            business_logic.calculate_metrics_from_components,
+            front_component_id, rear_component_id, wheel_circumference, crank_length, cadence
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Component not found")
+    return result
+
+@app.post("/api/metrics/batch")
+async def gear_metrics_batch(request: Request):
+    body = await _json_body(request)
+    try:
+        return await database_manager.run_sync(
+            business_logic.get_configuration_metrics,
+            body["configuration_ids"],
+            body.get("wheel_circumference"),
+            body.get("crank_length"),
+            body.get("cadences")
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/analysis")
+async def gear_overlap_analysis(front_component_id: str, rear_component_id: str, tolerance: Optional[float] = None):
+    try:
+        result = await database_manager.run_sync(
+            business_logic.analyze_overlap_from_components, front_component_id, rear_component_id, tolerance
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Component not found")
+    return result
+
+@app.post("/api/analysis/batch")
+async def gear_overlap_analysis_batch(request: Request):
+    body = await _json_body(request)
+    try:
+        return await database_manager.run_sync(
+            business_logic.analyze_configuration_overlap, body["configuration_ids"], body.get("tolerance")
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _components_page_context(request, q, chainrings_after, cassettes_after):
+    try:
+        chainrings = await database_manager.run_sync(
+            business_logic.get_components_page, "Chainring", after=chainrings_after, search=q
+        )
+        cassettes = await database_manager.run_sync(
+            business_logic.get_components_page, "Cassette", after=cassettes_after, search=q
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
         "request": request,
-        "chainrings": chainrings,
-        "cassettes": cassettes,
-        "edit_component": None
-    })
+        "chainrings": chainrings["components"],
+        "cassettes": cassettes["components"],
+        "search": q or "",
+        "chainrings_next_url": _page_url(request, "chainrings_after", chainrings["next_cursor"]),
+        "cassettes_next_url": _page_url(request, "cassettes_after", cassettes["next_cursor"])
+    }
+
+@app.get("/components", response_class=HTMLResponse)
+async def components_page(
+    request: Request,
+    q: Optional[str] = None,
+    chainrings_after: Optional[str] = None,
+    cassettes_after: Optional[str] = None
+):
+    context = await _components_page_context(request, q, chainrings_after, cassettes_after)
+    return render_template("components.html", {**context, "edit_component": None})
+
+@app.post("/components/import")
+async def import_components(
+    file: UploadFile = File(...),
+    format: str = Form(None)
+):
+    fmt = format or component_io.detect_format(file.filename)
+    if fmt not in component_io.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+    try:
+        return await database_manager.run_sync(component_io.import_file, file.file, fmt)
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read import file: {e}")
+    except Exception as e:
+        logger.error(f"Error importing components: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@app.get("/components/export")
+async def export_components(format: str = "csv"):
+    if format not in component_io.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    chunks = component_io.write_components(business_logic.iter_component_rows(), format)
+    return StreamingResponse(
+        database_manager.iterate_sync(chunks),
+        media_type=component_io.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="components.{format}"'}
+    )
+
+@app.get("/configurations/export")
+async def export_configurations(format: str = "csv"):
+    if format not in configuration_io.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    chunks = configuration_io.write_configurations(
+        business_logic.iter_configuration_rows(configuration_io.EXPORT_BATCH_SIZE), format
+    )
+    return StreamingResponse(
+        database_manager.iterate_sync(chunks),
+        media_type=configuration_io.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="configurations.{format}"'}
+    )
 
 @app.get("/components/{component_id}", response_class=HTMLResponse)
-async def edit_component_page(request: Request, component_id: str):
-    chainrings = business_logic.get_components_by_type("Chainring")
-    cassettes = business_logic.get_components_by_type("Cassette")
-    component = business_logic.get_component(component_id)
-    
-    return templates.TemplateResponse("components.html", {
-        "request": request,
-        "chainrings": chainrings,
-        "cassettes": cassettes,
-        "edit_component": component
-    })
+async def edit_component_page(
+    request: Request,
+    component_id: str,
+    q: Optional[str] = None,
+    chainrings_after: Optional[str] = None,
+    cassettes_after: Optional[str] = None
+):
+    context = await _components_page_context(request, q, chainrings_after, cassettes_after)
+    component = await database_manager.run_sync(business_logic.get_component, component_id)
+    return render_template("components.html", {**context, "edit_component": component})
 
 @app.post("/components")
 async def save_component(
@@ -151,7 +480,7 @@ async def save_component(
     component_id: str = Form(None)
 ):
     try:
-        business_logic.save_component(name, type, teeth, speed, comments, component_id)
+        await database_manager.run_sync(business_logic.save_component, name, type, teeth, speed, comments, component_id)
         msg = "Component updated successfully" if component_id else "Component added successfully"
         return RedirectResponse(url=f"/components?msg={msg}", status_code=303)
     except ValueError as e:
@@ -160,14 +489,48 @@ async def save_component(
         logger.error(f"Error saving component: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@app.post("/components/delete")
+async def delete_components(component_ids: List[str] = Form(...)):
+    try:
+        components_deleted, configurations_deleted = await database_manager.run_sync(
+            business_logic.delete_components, component_ids
+        )
+        return {
+            "status": "success",
+            "components_deleted": components_deleted,
+            "configurations_deleted": configurations_deleted
+        }
+    except Exception as e:
+        logger.error(f"Error deleting components: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
 @app.delete("/components/{component_id}")
 async def delete_component(component_id: str):
     try:
-        business_logic.delete_component(component_id)
+        await database_manager.run_sync(business_logic.delete_component, component_id)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Error deleting component: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.post("/admin/cleanup-orphans")
+async def cleanup_orphans():
+    return await database_manager.run_sync(database_manager.cleanup_orphaned_configurations)
+
+@app.post("/admin/backup")
+async def backup_database():
+    # The backup uses its own SQLite connection, so it runs on a plain thread rather than the DB pool
+    try:
+        return await asyncio.to_thread(db_backup.backup_database)
+    except db_backup.BackupInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error backing up database: {e}")
+        raise HTTPException(status_code=500, detail="Backup failed")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
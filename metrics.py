@@ -0,0 +1,221 @@
+"""Request, database, template and cache metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and keeps per-request counters in a
+context variable. database_manager reports each query through record_query
+and main reports template rendering through record_render, so the counts
+end up on the request that caused them.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+
+import cache
+
+logger = logging.getLogger(__name__)
+
+# Log requests slower than this many milliseconds (0 disables slow-request logging)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+_lock = threading.Lock()
+_registry = []
+
+class RequestStats:
+    """Counters for the request currently being handled."""
+    __slots__ = ("queries", "query_time", "render_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.render_time = 0.0
+
+_current_request = contextvars.ContextVar("current_request", default=None)
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+_INF_LABEL = 'le="+Inf"'
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}")
+        return lines
+
+class Gauge:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        _registry.append(self)
+
+    def set(self, value, *labels):
+        with _lock:
+            self._values[labels] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with _lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labelnames = labelnames
+        self._series = {}  # labels -> [count per bucket..., sum, count]
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        with _lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = _format_labels(self.labelnames, labels, f'le="{_format_number(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, _INF_LABEL)} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+request_duration = Histogram(
+    "gearcalc_http_request_duration_seconds", "Time to handle a request.", LATENCY_BUCKETS, ("method", "route"))
+requests_total = Counter(
+    "gearcalc_http_requests_total", "Requests handled.", ("method", "route", "status"))
+request_queries = Histogram(
+    "gearcalc_db_queries_per_request", "SQLite queries executed per request.", QUERY_COUNT_BUCKETS, ("method", "route"))
+request_query_time = Histogram(
+    "gearcalc_db_time_per_request_seconds", "Time spent executing SQLite queries per request.", LATENCY_BUCKETS, ("method", "route"))
+queries_total = Counter(
+    "gearcalc_db_queries_total", "SQLite queries executed, including those outside requests.")
+query_time_total = Counter(
+    "gearcalc_db_query_seconds_total", "Time spent executing SQLite queries, including those outside requests.")
+startup_duration = Gauge(
+    "gearcalc_startup_phase_seconds", "Time taken by each startup phase, including deferred maintenance.", ("phase",))
+render_duration = Histogram(
+    "gearcalc_template_render_duration_seconds", "Time to render a template.", LATENCY_BUCKETS, ("template",))
+
+def record_query(seconds):
+    """Called by the database layer after every executed statement."""
+    queries_total.inc()
+    query_time_total.inc(amount=seconds)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += seconds
+
+def record_render(template, seconds):
+    """Called after a template has been rendered."""
+    render_duration.observe(seconds, template)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.render_time += seconds
+
+def _render_cache_stats():
+    lines = []
+    caches = cache.get_cache_stats()
+    for metric, key, kind, help in (
+        ("gearcalc_cache_hits_total", "hits", "counter", "Cache lookups that found an entry."),
+        ("gearcalc_cache_misses_total", "misses", "counter", "Cache lookups that found nothing."),
+        ("gearcalc_cache_evictions_total", "evictions", "counter", "Entries evicted because the cache was full."),
+        ("gearcalc_cache_invalidations_total", "invalidations", "counter", "Times the cache was cleared."),
+        ("gearcalc_cache_entries", "size", "gauge", "Entries currently cached."),
+        ("gearcalc_cache_hit_ratio", "hit_rate", "gauge", "Hits divided by lookups."),
+    ):
+        lines.append(f"# HELP {metric} {help}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for stats in caches:
+            lines.append(f'{metric}{{cache="{_escape(stats["name"])}"}} {_format_number(stats[key])}')
+    return lines
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.extend(_render_cache_stats())
+    return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and per-request query and render counters."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else "other"
+            method = scope["method"]
+
+            request_duration.observe(elapsed, method, route_path)
+            requests_total.inc(method, route_path, str(status["code"]))
+            request_queries.observe(stats.queries, method, route_path)
+            request_query_time.observe(stats.query_time, method, route_path)
+
+            if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                logger.warning(
+                    f"Slow request: {method} {scope['path']} ({route_path}) {status['code']} "
+                    f"took {elapsed * 1000:.1f} ms, {stats.queries} queries in {stats.query_time * 1000:.1f} ms, "
+                    f"render {stats.render_time * 1000:.1f} ms"
+                )
@@ -0,0 +1,224 @@
+"""Sorted index of every chainring x cassette cog ratio in the component library.
+
+Each entry is one (chainring tooth, cog) combination from one chainring
+component and one cassette component. Entries are kept in parallel NumPy
+arrays sorted by ratio, so range and nearest-ratio lookups are binary
+searches instead of a calculation over every component pair.
+
+The index is updated in place when components are saved, imported or
+deleted: entries of a changed component are dropped with one mask and its
+new entries are merged in at their sorted positions.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FRONT_TYPE = "Chainring"
+REAR_TYPE = "Cassette"
+
+class _Snapshot:
+    """Immutable index state. Writers build a new snapshot and swap it in, so readers never need the lock."""
+    __slots__ = ("ratios", "front", "rear", "front_teeth", "rear_teeth", "components")
+
+    def __init__(self, ratios, front, rear, front_teeth, rear_teeth, components):
+        self.ratios = ratios            # float64, sorted ascending
+        self.front = front              # int32 component codes
+        self.rear = rear
+        self.front_teeth = front_teeth  # uint16 tooth counts
+        self.rear_teeth = rear_teeth
+        self.components = components    # code -> (id, name, type, teeth)
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.uint16),
+            np.empty(0, dtype=np.uint16),
+            {}
+        )
+
+    def arrays(self):
+        return (self.ratios, self.front, self.rear, self.front_teeth, self.rear_teeth)
+
+def _tooth_pool(components, type):
+    """Flatten the teeth of every component of type into parallel (code, tooth) arrays."""
+    codes = []
+    teeth = []
+    for code, (_, _, comp_type, comp_teeth) in components.items():
+        if comp_type == type:
+            codes.extend([code] * len(comp_teeth))
+            teeth.extend(comp_teeth)
+    return np.asarray(codes, dtype=np.int32), np.asarray(teeth, dtype=np.uint16)
+
+def _combine(front_codes, front_teeth, rear_codes, rear_teeth):
+    """Entries for every front tooth x rear tooth combination, sorted by ratio."""
+    n_front, n_rear = len(front_codes), len(rear_codes)
+    front_codes = np.repeat(front_codes, n_rear)
+    front_teeth = np.repeat(front_teeth, n_rear)
+    rear_codes = np.tile(rear_codes, n_front)
+    rear_teeth = np.tile(rear_teeth, n_front)
+    ratios = front_teeth.astype(np.float64) / rear_teeth
+    order = np.argsort(ratios, kind="stable")
+    return (ratios[order], front_codes[order], rear_codes[order], front_teeth[order], rear_teeth[order])
+
+class RatioIndex:
+    """Sorted ratio index over the component library. Thread-safe; built on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = _Snapshot.empty()
+        self._codes = {}  # component id -> code
+        self._next_code = 0
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._snapshot.ratios)
+
+    def ensure_loaded(self, load_components):
+        """
+        Build the index from load_components() unless it is already loaded.
+        The loader runs under the index lock, so a component saved while it reads is
+        either in its result or applied by upsert() once the build has finished.
+        """
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            self._codes = {}
+            self._next_code = 0
+            self._snapshot = _Snapshot.empty()
+            self._upsert(load_components())
+            self.loaded = True
+        logger.info(f"Ratio index built with {len(self)} entries in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def invalidate(self):
+        """Drop the index; it is rebuilt from the database on next use."""
+        with self._lock:
+            self._snapshot = _Snapshot.empty()
+            self._codes = {}
+            self.loaded = False
+
+    def upsert(self, components):
+        """Add or replace components. Does nothing until the index has been loaded."""
+        with self._lock:
+            if self.loaded:
+                self._upsert(components)
+
+    def remove(self, component_ids):
+        """Remove components and all their entries. Does nothing until the index has been loaded."""
+        with self._lock:
+            if not self.loaded:
+                return
+            codes = [self._codes.pop(component_id) for component_id in component_ids if component_id in self._codes]
+            if codes:
+                snapshot = self._snapshot
+                keep = ~(np.isin(snapshot.front, codes) | np.isin(snapshot.rear, codes))
+                components = {code: info for code, info in snapshot.components.items() if code not in codes}
+                self._snapshot = _Snapshot(*(array[keep] for array in snapshot.arrays()), components)
+
+    def _upsert(self, components):
+        """Merge components into the index. Caller holds the lock."""
+        rows = [_component_row(comp) for comp in components]
+        if not rows:
+            return
+
+        snapshot = self._snapshot
+        components = dict(snapshot.components)
+        arrays = snapshot.arrays()
+
+        # Replaced components lose their old entries first
+        replaced = [self._codes[row[0]] for row in rows if row[0] in self._codes]
+        if replaced:
+            keep = ~(np.isin(snapshot.front, replaced) | np.isin(snapshot.rear, replaced))
+            arrays = tuple(array[keep] for array in arrays)
+
+        new_codes = []
+        for component_id, name, type, teeth in rows:
+            code = self._codes.get(component_id)
+            if code is None:
+                code = self._codes[component_id] = self._next_code
+                self._next_code += 1
+            components[code] = (component_id, name, type, teeth)
+            new_codes.append(code)
+
+        # New entries: new chainrings against all cassettes, and new cassettes against the other chainrings
+        front_codes, front_teeth = _tooth_pool(components, FRONT_TYPE)
+        rear_codes, rear_teeth = _tooth_pool(components, REAR_TYPE)
+        new_front = np.isin(front_codes, new_codes)
+        new_rear = np.isin(rear_codes, new_codes)
+        blocks = [
+            _combine(front_codes[new_front], front_teeth[new_front], rear_codes, rear_teeth),
+            _combine(front_codes[~new_front], front_teeth[~new_front], rear_codes[new_rear], rear_teeth[new_rear]),
+        ]
+        if not len(arrays[0]):
+            # Nothing to merge into: sort the new entries together
+            merged = tuple(np.concatenate(parts) for parts in zip(*blocks))
+            order = np.argsort(merged[0], kind="stable")
+            arrays = tuple(array[order] for array in merged)
+        else:
+            for block in blocks:
+                if len(block[0]):
+                    positions = np.searchsorted(arrays[0], block[0], side="right")
+                    arrays = tuple(np.insert(array, positions, values) for array, values in zip(arrays, block))
+
+        self._snapshot = _Snapshot(*arrays, components)
+
+    def between(self, min_ratio, max_ratio, limit):
+        """
+        Entries with min_ratio <= ratio <= max_ratio, in ascending ratio order.
+        Returns (total matching, first limit entries as dicts).
+        """
+        snapshot = self._snapshot
+        start = np.searchsorted(snapshot.ratios, min_ratio, side="left")
+        stop = np.searchsorted(snapshot.ratios, max_ratio, side="right")
+        total = max(int(stop - start), 0)
+        return total, [_entry(snapshot, i) for i in range(start, min(stop, start + limit))]
+
+    def nearest(self, ratio, k):
+        """The k entries closest to ratio, closest first, each with its difference from ratio."""
+        snapshot = self._snapshot
+        position = np.searchsorted(snapshot.ratios, ratio)
+        # The k closest entries lie within k positions of the insertion point
+        low = max(position - k, 0)
+        high = min(position + k, len(snapshot.ratios))
+        differences = np.abs(snapshot.ratios[low:high] - ratio)
+        order = np.argsort(differences, kind="stable")[:k]
+        results = []
+        for i in order:
+            entry = _entry(snapshot, low + i)
+            entry["difference"] = round(float(differences[i]), 3)
+            results.append(entry)
+        return results
+
+    def stats(self):
+        """Return entry and component counts for monitoring."""
+        snapshot = self._snapshot
+        return {"loaded": self.loaded, "entries": len(snapshot.ratios), "components": len(snapshot.components)}
+
+def _component_row(comp):
+    """(id, name, type, teeth) from a component model instance or dict."""
+    if isinstance(comp, dict):
+        return comp["id"], comp["name"], comp["type"], [int(t) for t in comp["teeth"]]
+    return comp.id, comp.name, comp.type, [int(t) for t in comp.teeth]
+
+def _entry(snapshot, i):
+    front_id, front_name, _, _ = snapshot.components[int(snapshot.front[i])]
+    rear_id, rear_name, _, _ = snapshot.components[int(snapshot.rear[i])]
+    return {
+        "ratio": round(float(snapshot.ratios[i]), 3),
+        "front_component_id": front_id,
+        "front_name": front_name,
+        "front_tooth": int(snapshot.front_teeth[i]),
+        "rear_component_id": rear_id,
+        "rear_name": rear_name,
+        "rear_tooth": int(snapshot.rear_teeth[i])
+    }
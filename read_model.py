@@ -0,0 +1,220 @@
+"""In-memory copy of the components and configurations tables.
+
+When enabled (IN_MEMORY_READS=1), database_manager serves its by-id,
+by-type and by-component reads from here instead of querying SQLite. Rows
+are held as plain dicts, indexed by id, by component type and by the
+components each configuration uses; callers get fresh model instances
+built from them, so nothing they change leaks back into the model.
+
+Writes still go to SQLite first and are then applied here (write-through).
+The model is loaded on first use, and dropped and reloaded whenever
+another process has changed the data.
+"""
+
+import logging
+import threading
+import time
+
+from database_model import Component, GearConfiguration
+
+logger = logging.getLogger(__name__)
+
+class ReadModel:
+    """Indexed in-memory rows of Component and GearConfiguration. Thread-safe; loaded on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+        self.loaded = False
+
+    def _clear(self):
+        self._components = {}      # id -> row
+        self._by_type = {}         # type -> {id: None}, in insertion order
+        self._configurations = {}  # id -> row
+        self._usage = {}           # component id -> {configuration id: None}
+
+    def ensure_loaded(self, load_rows):
+        """
+        Load from load_rows() -> (component rows, configuration rows) unless already loaded.
+        The loader runs under the lock, so a write applied meanwhile waits and lands on top of it.
+        """
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            components, configurations = load_rows()
+            self._clear()
+            for row in components:
+                self._put_component(row)
+            for row in configurations:
+                self._put_configuration(row)
+            self.loaded = True
+        logger.info(
+            f"Read model loaded {len(components)} component(s) and {len(configurations)} configuration(s) "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    def invalidate(self):
+        """Drop everything; the model is reloaded from the database on next use."""
+        with self._lock:
+            self._clear()
+            self.loaded = False
+
+    # Write-through. Each does nothing until the model has been loaded.
+
+    def put_components(self, rows):
+        with self._lock:
+            if self.loaded:
+                for row in rows:
+                    self._put_component(dict(row))
+
+    def update_component(self, component_id, fields):
+        with self._lock:
+            row = self._components.get(component_id)
+            if row is not None:
+                self._put_component({**row, **fields})
+
+    def delete_components(self, component_ids):
+        """Remove components and every configuration that uses them."""
+        with self._lock:
+            if not self.loaded:
+                return
+            for component_id in component_ids:
+                row = self._components.pop(component_id, None)
+                if row is not None:
+                    self._by_type.get(row["type"], {}).pop(component_id, None)
+                for config_id in list(self._usage.get(component_id, ())):
+                    self._delete_configuration(config_id)
+
+    def put_configuration(self, row):
+        with self._lock:
+            if self.loaded:
+                self._put_configuration(dict(row))
+
+    def update_configurations(self, updates):
+        """Apply {configuration id: {field: value}} to the configurations that exist."""
+        with self._lock:
+            for config_id, fields in updates.items():
+                row = self._configurations.get(config_id)
+                if row is not None:
+                    self._put_configuration({**row, **fields})
+
+    def delete_configurations(self, config_ids):
+        with self._lock:
+            for config_id in config_ids:
+                self._delete_configuration(config_id)
+
+    def delete_orphaned_configurations(self):
+        """Remove configurations whose components no longer exist, as cleanup_orphaned_configurations does."""
+        with self._lock:
+            orphans = [
+                config_id for config_id, row in self._configurations.items()
+                if row["front_component_id"] not in self._components or row["rear_component_id"] not in self._components
+            ]
+            for config_id in orphans:
+                self._delete_configuration(config_id)
+
+    def _put_component(self, row):
+        previous = self._components.get(row["id"])
+        self._components[row["id"]] = row
+        if previous is None:
+            self._by_type.setdefault(row["type"], {})[row["id"]] = None
+        elif previous["type"] != row["type"]:
+            # Keep each type in table order, as SQLite returns it
+            self._by_type[previous["type"]].pop(row["id"], None)
+            self._by_type[row["type"]] = {
+                component_id: None for component_id, comp in self._components.items() if comp["type"] == row["type"]
+            }
+
+    def _put_configuration(self, row):
+        previous = self._configurations.get(row["id"])
+        if previous is not None:
+            self._unlink(previous)
+        self._configurations[row["id"]] = row
+        for component_id in (row["front_component_id"], row["rear_component_id"]):
+            self._usage.setdefault(component_id, {})[row["id"]] = None
+
+    def _delete_configuration(self, config_id):
+        row = self._configurations.pop(config_id, None)
+        if row is not None:
+            self._unlink(row)
+
+    def _unlink(self, row):
+        for component_id in (row["front_component_id"], row["rear_component_id"]):
+            users = self._usage.get(component_id)
+            if users is not None:
+                users.pop(row["id"], None)
+                if not users:
+                    del self._usage[component_id]
+
+    # Reads. Each returns new model instances; the stored rows are never handed out.
+
+    def get_component(self, component_id):
+        with self._lock:
+            row = self._components.get(component_id)
+            return _component(row) if row is not None else None
+
+    def get_components(self, type=None):
+        with self._lock:
+            if type:
+                ids = self._by_type.get(type, ())
+                return [_component(self._components[component_id]) for component_id in ids]
+            return [_component(row) for row in self._components.values()]
+
+    def get_configuration(self, config_id):
+        """The configuration with its components attached (missing components are left as IDs)."""
+        with self._lock:
+            row = self._configurations.get(config_id)
+            return self._configuration(row, require_components=False) if row is not None else None
+
+    def get_configurations(self):
+        with self._lock:
+            return [_configuration(row) for row in self._configurations.values()]
+
+    def get_configurations_with_components(self, component_id=None, missing_total_range=False, ids=None):
+        """Same selection as database_manager.get_configurations_with_components, including leaving out orphans."""
+        with self._lock:
+            if ids is not None:
+                rows = (self._configurations.get(config_id) for config_id in dict.fromkeys(ids))
+            elif component_id:
+                rows = (self._configurations[config_id] for config_id in self._usage.get(component_id, ()))
+            else:
+                rows = self._configurations.values()
+            configs = []
+            for row in rows:
+                if row is None:
+                    continue
+                if component_id and component_id not in (row["front_component_id"], row["rear_component_id"]):
+                    continue
+                if missing_total_range and row["total_range"] is not None:
+                    continue
+                config = self._configuration(row, require_components=True)
+                if config is not None:
+                    configs.append(config)
+            return configs
+
+    def _configuration(self, row, require_components):
+        """Build a configuration with both components attached, or None if one is missing and required."""
+        front = self._components.get(row["front_component_id"])
+        rear = self._components.get(row["rear_component_id"])
+        if require_components and (front is None or rear is None):
+            return None
+        config = _configuration(row)
+        if front is not None:
+            config.front_component_id = _component(front)
+        if rear is not None:
+            config.rear_component_id = _component(rear)
+        return config
+
+    def stats(self):
+        """Return row counts for monitoring."""
+        with self._lock:
+            return {"loaded": self.loaded, "components": len(self._components), "configurations": len(self._configurations)}
+
+def _component(row):
+    return Component(**{**row, "teeth": list(row["teeth"])})
+
+def _configuration(row):
+    return GearConfiguration(**row)
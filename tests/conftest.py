@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# database_manager creates the directory of DATABASE_PATH on import, so point it somewhere disposable first
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="gear-calc-tests-"), "gear_calc.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    """A seeded database of the test module's own, open for the module, so its writes do not show up in other modules."""
+    import database_manager
+    from seed_data import seed_database
+
+    shared_path = database_manager.DATABASE_PATH
+    database_manager.DATABASE_PATH = str(tmp_path_factory.mktemp("database") / "gear_calc.db")
+    database_manager.initialize_db()
+    with database_manager.connection():
+        seed_database()
+        yield
+    database_manager.close_db()
+    database_manager.DATABASE_PATH = shared_path
@@ -0,0 +1,146 @@
+"""Component imports: chunked inserts, rows rejected part-way through, and the report returned to the route."""
+
+import io
+import json
+
+import pytest
+
+import business_logic
+import component_io
+import database_manager
+
+
+@pytest.fixture
+def inserts(database, monkeypatch):
+    """The size of every chunk inserted by add_components_bulk."""
+    sizes = []
+    add_components_bulk = database_manager.add_components_bulk
+
+    def record(rows, *args, **kwargs):
+        sizes.append(len(rows))
+        return add_components_bulk(rows, *args, **kwargs)
+
+    monkeypatch.setattr(database_manager, "add_components_bulk", record)
+    return sizes
+
+
+def stored(prefix):
+    """(name, type, speed, teeth, comments) of the stored components whose names start with prefix, by name."""
+    return sorted(
+        (c.name, c.type, c.speed, list(c.teeth), c.comments)
+        for c in database_manager.get_components() if c.name.startswith(prefix)
+    )
+
+
+def import_text(text, fmt, chunk_size=2):
+    return component_io.import_file(io.BytesIO(text.encode()), fmt, chunk_size=chunk_size)
+
+
+def test_csv_import_with_invalid_rows(inserts):
+    text = "\n".join([
+        "name,type,speed,teeth,comments",
+        "CSV ring,Chainring,,\"50,34\",compact",
+        ",Cassette,,\"11,12\",",                 # 2: no name
+        "CSV cassette A,Cassette,3,\"11,13,15\",",
+        "CSV bad type,Crankset,,40,",           # 4
+        "CSV cassette B,Cassette,,\"11,28\",",
+        "CSV bad teeth,Cassette,,\"11,12.5\",",  # 6
+        "CSV bad speed,Cassette,4,\"11,13\",",   # 7
+        "CSV ring B,Chainring,,40,",
+        "CSV ring C,Chainring,,42,",
+    ]) + "\n"
+    report = import_text(text, "csv")
+
+    assert report["imported"] == 5 and report["skipped"] == 4
+    assert [error["row"] for error in report["errors"]] == [2, 4, 6, 7]
+    assert report["errors"][0]["error"] == "Name is required."
+    assert "Speed value (4)" in report["errors"][3]["error"]
+    # Two full chunks, then the rest
+    assert inserts == [2, 2, 1]
+    assert stored("CSV") == [
+        ("CSV cassette A", "Cassette", 3, [11, 13, 15], None),
+        ("CSV cassette B", "Cassette", None, [11, 28], None),
+        ("CSV ring", "Chainring", None, [50, 34], "compact"),
+        ("CSV ring B", "Chainring", None, [40], None),
+        ("CSV ring C", "Chainring", None, [42], None),
+    ]
+
+
+def test_jsonl_import_reports_unparseable_lines(inserts):
+    lines = [
+        json.dumps({"name": "JSONL ring", "type": "Chainring", "teeth": [46, 30]}),
+        "{not json",
+        json.dumps(["JSONL list", "Chainring", [40]]),
+        json.dumps({"name": "JSONL cassette", "type": "Cassette", "speed": 2, "teeth": "11, 32"}),
+        "",
+        json.dumps({"name": 7, "type": "Cassette", "teeth": [11]}),
+        json.dumps({"name": "JSONL null tooth", "type": "Cassette", "teeth": [11, None]}),
+        json.dumps({"name": "JSONL note", "type": "Cassette", "teeth": [11], "comments": {"a": 1}}),
+        json.dumps({"name": "JSONL last", "type": "Cassette", "teeth": [12]}),
+    ]
+    report = import_text("\n".join(lines) + "\n", "jsonl")
+
+    assert report["imported"] == 3 and report["skipped"] == 5
+    assert [error["row"] for error in report["errors"]] == [2, 3, 5, 6, 7]
+    assert report["errors"][0]["error"].startswith("Invalid JSON")
+    assert report["errors"][1]["error"] == "Each row must be an object with name, type and teeth."
+    assert report["errors"][2]["error"] == "Name must be text."
+    assert report["errors"][3]["error"].startswith("Invalid teeth format")
+    assert report["errors"][4]["error"] == "Comments must be text."
+    assert inserts == [2, 1]
+    assert [row[0] for row in stored("JSONL")] == ["JSONL cassette", "JSONL last", "JSONL ring"]
+
+
+def test_json_import(inserts):
+    rows = [{"name": "JSON ring", "type": "Chainring", "teeth": [52, 36]}, "nope", {"name": "JSON cassette", "type": "Cassette"}]
+    report = import_text(json.dumps(rows), "json")
+    assert report == {"imported": 1, "skipped": 2, "errors": [
+        {"row": 2, "error": "Each row must be an object with name, type and teeth."},
+        {"row": 3, "error": "Teeth are required."},
+    ]}
+    assert inserts == [1]
+    with pytest.raises(ValueError, match="array"):
+        import_text(json.dumps({"name": "JSON object"}), "json")
+
+
+def test_errors_are_capped(database):
+    rows = [{"name": "", "type": "Cassette", "teeth": [11]}] * 30
+    report = business_logic.import_components(rows, chunk_size=2, max_errors=5)
+    assert (report["imported"], report["skipped"], len(report["errors"])) == (0, 30, 5)
+
+
+def test_failure_part_way_keeps_inserted_chunks(inserts):
+    business_logic.get_component_options("Cassette")
+
+    def rows():
+        for i in range(5):
+            yield {"name": f"Partial {i}", "type": "Cassette", "teeth": [11, 20 + i]}
+        raise OSError("connection reset")
+
+    with pytest.raises(OSError):
+        business_logic.import_components(rows(), chunk_size=2)
+
+    # The two full chunks are committed; the half-filled third one is not
+    assert inserts == [2, 2]
+    assert [row[0] for row in stored("Partial")] == [f"Partial {i}" for i in range(4)]
+    # and the caches were refreshed for them
+    assert "Cassette" not in business_logic._component_options
+    names = {option["text"] for option in business_logic.get_component_options("Cassette")}
+    assert {f"Partial {i}" for i in range(4)} <= names
+
+
+def test_import_route_returns_the_report(database):
+    from fastapi.testclient import TestClient
+    import main
+
+    text = "name,type,teeth\nRoute ring,Chainring,\"48,32\"\nRoute bad,Chainring,abc\n"
+    with TestClient(main.app) as client:
+        response = client.post("/components/import", files={"file": ("catalogue.csv", text, "text/csv")})
+        assert response.status_code == 200
+        assert response.json() == {"imported": 1, "skipped": 1, "errors": [
+            {"row": 2, "error": "Invalid teeth format. Must be comma-separated whole numbers (integers) only, no decimals."},
+        ]}
+        response = client.post("/components/import", files={"file": ("catalogue.json", "{", "application/json")})
+        assert response.status_code == 400
+    with database_manager.connection():
+        assert [row[0] for row in stored("Route")] == ["Route ring"]
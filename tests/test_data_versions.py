@@ -0,0 +1,136 @@
+"""Data version tracking must tell this process's own writes apart from writes made by other processes."""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import business_logic
+import database_manager
+from read_model import ReadModel
+
+
+@pytest.fixture
+def changes(database):
+    """Every set of kinds the external change listeners are called with."""
+    seen = []
+    database_manager.add_data_change_listener(seen.append)
+    database_manager.refresh_data_versions()
+    yield seen
+    database_manager._data_change_listeners.remove(seen.append)
+
+
+@pytest.fixture
+def read_model(database, monkeypatch):
+    model = ReadModel()
+    monkeypatch.setattr(database_manager, "_read_model", model)
+    database_manager.load_read_model()
+    assert model.loaded
+    return model
+
+
+def external_write(sql, *params):
+    """Write through a connection of our own, as another worker or a CLI tool would."""
+    with sqlite3.connect(database_manager.DATABASE_PATH) as conn:
+        conn.execute(sql, params)
+    conn.close()
+
+
+def stored_versions():
+    return database_manager._read_data_versions()
+
+
+def test_concurrent_own_writes_are_not_external(changes, read_model, monkeypatch):
+    errors = []
+    apply_data_versions = database_manager._apply_data_versions
+
+    def slow_apply(versions, own=None):
+        # Widen the window between a write committing and reporting its version, where other threads refresh
+        if own:
+            time.sleep(0.002)
+        apply_data_versions(versions, own)
+
+    monkeypatch.setattr(database_manager, "_apply_data_versions", slow_apply)
+
+    def writer(n):
+        try:
+            with database_manager.connection():
+                for i in range(20):
+                    if i % 5 == 4:
+                        database_manager.update_user_preferences(0.5 + n / 10, 4.0)
+                    else:
+                        database_manager.add_component(f"Concurrent {n}-{i}", "Cassette", [11, 13 + n, 28])
+                    # The middleware refreshes while other threads are writing
+                    database_manager.refresh_data_versions()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    database_manager.refresh_data_versions()
+
+    assert errors == []
+    assert changes == []
+    assert read_model.loaded
+    versions = stored_versions()
+    assert database_manager.get_data_version(*database_manager.DATA_KINDS) == ":".join(
+        str(versions[kind]) for kind in (database_manager.EPOCH_KIND,) + database_manager.DATA_KINDS
+    )
+    assert database_manager._writes_in_flight == dict.fromkeys(database_manager.DATA_KINDS, 0)
+
+
+def test_external_write_invalidates_caches(changes, read_model):
+    business_logic.get_component_options("Cassette")
+    business_logic.find_ratios_between(1.0, 2.0, limit=10)
+    database_manager.get_user_preferences()
+    assert business_logic._component_options and len(business_logic.gear_ratio_index)
+    before = database_manager.get_data_version("components")
+
+    external_write("UPDATE dataversion SET version = version + 1 WHERE kind = 'components'")
+    database_manager.refresh_data_versions()
+
+    assert changes == [{"components"}]
+    assert database_manager.get_data_version("components") != before
+    assert not read_model.loaded
+    assert not business_logic._component_options
+    assert len(business_logic.gear_ratio_index) == 0
+    assert database_manager._preferences is not None
+
+    external_write("UPDATE dataversion SET version = version + 1 WHERE kind = 'preferences'")
+    database_manager.refresh_data_versions()
+    assert changes[-1] == {"preferences"}
+    assert database_manager._preferences is None
+
+    # Seen once, a write is not reported again
+    database_manager.refresh_data_versions()
+    assert len(changes) == 2
+
+
+def test_epoch_change_resets_everything(changes, read_model):
+    before = database_manager.get_data_version(*database_manager.DATA_KINDS)
+    epoch = stored_versions()[database_manager.EPOCH_KIND]
+
+    external_write("UPDATE dataversion SET version = ? WHERE kind = ?", epoch + 1, database_manager.EPOCH_KIND)
+    database_manager.refresh_data_versions()
+
+    assert changes == [set(database_manager.DATA_KINDS)]
+    assert not read_model.loaded
+    after = database_manager.get_data_version(*database_manager.DATA_KINDS)
+    assert after != before and after.split(":")[1:] == before.split(":")[1:]
+
+    # Own writes after the reset are still recognised as own
+    database_manager.add_component("After epoch", "Chainring", [40])
+    database_manager.refresh_data_versions()
+    assert len(changes) == 1
+
+
+def test_only_server_startup_replaces_the_epoch(database):
+    epoch = stored_versions()[database_manager.EPOCH_KIND]
+    database_manager.initialize_db()
+    assert stored_versions()[database_manager.EPOCH_KIND] == epoch
+    database_manager.initialize_db(new_epoch=True)
+    assert stored_versions()[database_manager.EPOCH_KIND] != epoch
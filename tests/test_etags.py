@@ -0,0 +1,25 @@
+"""If-None-Match handling."""
+
+import pytest
+
+from utils import etag_matches
+
+ETAG = '"abc"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"old", "abc"', True),
+    ('"old"', False),
+    ("*", True),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+def test_star_only_matches_an_existing_representation():
+    assert not etag_matches("*", ETAG, match_any=False)
+    assert not etag_matches('"old", *', ETAG, match_any=False)
+    assert etag_matches('*, "abc"', ETAG, match_any=False)
@@ -0,0 +1,95 @@
+"""The vectorized gear engine must give the same tables as the original per-gear calculation."""
+
+import itertools
+import types
+
+import pytest
+
+import business_logic
+import gear_engine
+from seed_data import SEED_COMPONENTS
+
+CHAINRINGS = [c["teeth"] for c in SEED_COMPONENTS if c["type"] == "Chainring"]
+CASSETTES = [c["teeth"] for c in SEED_COMPONENTS if c["type"] == "Cassette"]
+
+# Every seed chainring with every seed cassette, plus multi-ring and edge cases
+PAIRS = [(front, rear) for front in CHAINRINGS for rear in CASSETTES] + [
+    ([50, 34], CASSETTES[0]),
+    ([48, 35, 22], CASSETTES[1]),
+    ([40], [11]),
+    ([40], []),
+    ([], CASSETTES[2]),
+]
+
+PREFERENCES = [None, types.SimpleNamespace(min_ratio=0.8, max_ratio=3.2), types.SimpleNamespace(min_ratio=1.0, max_ratio=2.0)]
+
+
+def reference_gear_ratios(front_teeth, rear_teeth, preferences=None):
+    """The per-gear calculation the engine replaced, kept as the reference."""
+    results = []
+    sorted_rear = sorted(rear_teeth, reverse=True)
+
+    for front in front_teeth:
+        gears = []
+        prev_ratio = 0
+
+        for i, rear in enumerate(sorted_rear):
+            ratio = round(front / rear, 3)
+
+            change_pct = 0
+            if prev_ratio > 0:
+                change_pct = round(((ratio - prev_ratio) / prev_ratio) * 100, 1)
+
+            status = "normal"
+            if preferences:
+                min_r = preferences.min_ratio
+                max_r = preferences.max_ratio
+                warning_buffer = (max_r - min_r) * 0.1
+
+                if ratio < min_r or ratio > max_r:
+                    status = "poor"
+                elif (ratio < min_r + warning_buffer) or (ratio > max_r - warning_buffer):
+                    status = "warning"
+                else:
+                    status = "optimal"
+
+            gears.append({
+                "rear_tooth": rear,
+                "ratio": ratio,
+                "gear_num": i + 1,
+                "change_pct": change_pct if i > 0 else None,
+                "status": status
+            })
+            prev_ratio = ratio
+
+        total_range = business_logic.calculate_total_range_value([front], rear_teeth) if gears else 0
+        results.append({"front_tooth": front, "total_range": total_range, "gears": gears})
+
+    return results
+
+
+@pytest.mark.parametrize("preferences", PREFERENCES)
+@pytest.mark.parametrize("front, rear", PAIRS)
+def test_tables_match_reference(front, rear, preferences):
+    tables = gear_engine.calculate_gear_tables(front, rear, preferences)
+    assert gear_engine.tables_to_dicts(tables) == reference_gear_ratios(front, rear, preferences)
+
+
+@pytest.mark.parametrize("preferences", PREFERENCES)
+def test_batch_matches_single(preferences):
+    batch = gear_engine.calculate_gear_tables_batch(PAIRS, preferences)
+    assert [gear_engine.tables_to_dicts(tables) for tables in batch] == [
+        gear_engine.tables_to_dicts(gear_engine.calculate_gear_tables(front, rear, preferences)) for front, rear in PAIRS
+    ]
+
+
+def test_gear_objects_match_dicts():
+    for table in gear_engine.calculate_gear_tables([50, 34], CASSETTES[0], PREFERENCES[1]):
+        assert [gear.to_dict() for gear in table.gears] == table.to_dict()["gears"]
+        assert len(table) == len(CASSETTES[0])
+
+
+@pytest.mark.parametrize("front, rear", list(itertools.product(CHAINRINGS + [[50, 34]], CASSETTES)))
+def test_ring_ranges_match_total_range(front, rear):
+    for table in gear_engine.calculate_gear_tables(front, rear):
+        assert table.total_range == business_logic.calculate_total_range_value([table.front_tooth], rear)
@@ -0,0 +1,49 @@
+"""The overlap analysis shift sequence must be one a rider would actually use."""
+
+import pytest
+
+import gear_engine
+from tests.test_gear_engine import PAIRS
+
+CASSETTE_11_46 = [11, 13, 15, 17, 19, 21, 24, 28, 32, 37, 46]
+CASSETTE_11_34 = [11, 12, 13, 14, 15, 17, 19, 21, 23, 25, 28, 30, 34]
+
+
+def front_path(sequence):
+    """The chainrings the sequence rides on, in order, with repeats collapsed."""
+    rings = []
+    for gear in sequence:
+        if not rings or rings[-1] != gear["front_tooth"]:
+            rings.append(gear["front_tooth"])
+    return rings
+
+
+@pytest.mark.parametrize("front, rear, rings", [
+    ([48, 35, 22], CASSETTE_11_46, [22, 35, 48]),
+    ([50, 34], CASSETTE_11_34, [34, 50]),
+])
+def test_sequence_stays_on_each_ring(front, rear, rings):
+    analysis = gear_engine.analyze_overlap_batch([(front, rear)])[0]
+    sequence = analysis["shift_sequence"]
+    assert front_path(sequence) == rings
+    assert analysis["front_shifts"] == len(rings) - 1
+    assert (sequence[0]["front_tooth"], sequence[0]["rear_tooth"]) == (min(front), max(rear))
+    assert (sequence[-1]["front_tooth"], sequence[-1]["rear_tooth"]) == (max(front), min(rear))
+
+
+@pytest.mark.parametrize("front, rear", PAIRS)
+def test_sequence_climbs_through_usable_gears(front, rear):
+    analysis = gear_engine.analyze_overlap_batch([(front, rear)])[0]
+    sequence = analysis["shift_sequence"]
+    ratios = [gear["ratio"] for gear in sequence]
+    assert ratios == sorted(ratios) and len(set(ratios)) == len(ratios)
+    assert front_path(sequence) == sorted(front_path(sequence))
+    assert len(sequence) <= analysis["usable_gears"]
+    if len(front) == 1:
+        # A single ring just runs down the cassette
+        assert [gear["rear_tooth"] for gear in sequence] == sorted(rear, reverse=True)
+
+
+def test_batch_matches_single():
+    batch = gear_engine.analyze_overlap_batch(PAIRS)
+    assert batch == [gear_engine.analyze_overlap_batch([pair])[0] for pair in PAIRS]
@@ -0,0 +1,49 @@
+"""Page cursors from a request must be rejected with ValueError unless they are exactly what a page produced."""
+
+import datetime
+
+import pytest
+
+import business_logic
+from utils import encode_cursor
+
+
+@pytest.mark.parametrize("sort, value", [
+    ("created", "2024-05-01T10:30:00.123456"),
+    ("name", "Road 50/34"),
+    ("range", 0),
+    ("range", 412),
+])
+def test_cursor_round_trip(sort, value):
+    expected = datetime.datetime.fromisoformat(value) if sort == "created" else value
+    assert business_logic._decode_configuration_cursor(encode_cursor(sort, value, "id-1"), sort) == (expected, "id-1")
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("created", "not base64!"),
+    ("created", encode_cursor("created")),
+    ("created", encode_cursor("created", "2024-05-01T10:30:00", "id-1", "extra")),
+    ("created", encode_cursor("created", 20240501, "id-1")),
+    ("created", encode_cursor("created", None, "id-1")),
+    ("created", encode_cursor("created", "yesterday", "id-1")),
+    ("created", encode_cursor("created", "2024-05-01T10:30:00", 7)),
+    ("name", encode_cursor("name", ["a"], "id-1")),
+    ("name", encode_cursor("name", "Road", None)),
+    ("range", encode_cursor("range", "412", "id-1")),
+    ("range", encode_cursor("range", 41.2, "id-1")),
+    ("range", encode_cursor("range", True, "id-1")),
+])
+def test_malformed_configuration_cursor(sort, cursor):
+    with pytest.raises(ValueError, match="Invalid page cursor"):
+        business_logic._decode_configuration_cursor(cursor, sort)
+
+
+def test_cursor_for_another_sort():
+    with pytest.raises(ValueError, match="does not match the requested sort"):
+        business_logic._decode_configuration_cursor(encode_cursor("name", "Road", "id-1"), "range")
+
+
+@pytest.mark.parametrize("cursor", [encode_cursor("name", 5, "id-1"), encode_cursor("name", "Road"), encode_cursor({"name": "Road"})])
+def test_malformed_component_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid page cursor"):
+        business_logic.get_components_page(after=cursor)
@@ -0,0 +1,89 @@
+"""Ratio lookups through the sorted index must match a brute-force scan of the component library."""
+
+import pytest
+
+import business_logic
+import database_manager
+from seed_data import seed_database
+
+
+@pytest.fixture(scope="module")
+def library():
+    database_manager.initialize_db()
+    with database_manager.connection():
+        seed_database()
+        business_logic.gear_ratio_index.invalidate()
+        yield
+    database_manager.close_db()
+
+
+def brute_force_entries():
+    """Every chainring tooth x cog combination, computed one by one like the lookup it replaced."""
+    components = database_manager.get_components()
+    entries = []
+    for front in components:
+        if front.type != "Chainring":
+            continue
+        for rear in components:
+            if rear.type != "Cassette":
+                continue
+            for front_tooth in front.teeth:
+                for rear_tooth in rear.teeth:
+                    entries.append({
+                        "ratio": round(front_tooth / rear_tooth, 3),
+                        "exact": front_tooth / rear_tooth,
+                        "front_component_id": front.id,
+                        "front_name": front.name,
+                        "front_tooth": front_tooth,
+                        "rear_component_id": rear.id,
+                        "rear_name": rear.name,
+                        "rear_tooth": rear_tooth
+                    })
+    return entries
+
+
+def _key(entry):
+    return (entry["ratio"], entry["front_component_id"], entry["front_tooth"], entry["rear_component_id"], entry["rear_tooth"])
+
+
+def _public(entry):
+    return {k: v for k, v in entry.items() if k != "exact"}
+
+
+def check_between(min_ratio, max_ratio):
+    expected = [_public(e) for e in brute_force_entries() if min_ratio <= e["exact"] <= max_ratio]
+    result = business_logic.find_ratios_between(min_ratio, max_ratio, limit=business_logic.MAX_PAGE_SIZE)
+    assert result["total"] == len(expected)
+    assert sorted(result["items"], key=_key) == sorted(expected, key=_key)
+    ratios = [item["ratio"] for item in result["items"]]
+    assert ratios == sorted(ratios)
+
+
+def check_nearest(ratio, k):
+    entries = brute_force_entries()
+    expected = sorted(round(abs(e["exact"] - ratio), 3) for e in entries)[:k]
+    result = business_logic.find_nearest_ratios(ratio, k)
+    assert [item["difference"] for item in result] == expected
+    known = {_key(_public(e)) for e in entries}
+    assert all(_key({k: v for k, v in item.items() if k != "difference"}) in known for item in result)
+
+
+@pytest.mark.parametrize("min_ratio, max_ratio", [(0.5, 5.0), (1.0, 1.5), (2.5, 3.0), (3.3, 3.5), (10.0, 20.0)])
+def test_between_matches_brute_force(library, min_ratio, max_ratio):
+    check_between(min_ratio, max_ratio)
+
+
+@pytest.mark.parametrize("ratio, k", [(0.8, 5), (1.0, 10), (2.0, 3), (4.0, 1), (0.1, 4)])
+def test_nearest_matches_brute_force(library, ratio, k):
+    check_nearest(ratio, k)
+
+
+def test_index_follows_component_changes(library):
+    ring = business_logic.save_component("Test ring 50/34", "Chainring", "50, 34")
+    check_between(0.5, 5.0)
+    business_logic.save_component("Test ring 50/34", "Cassette", "11, 13, 44", component_id=ring.id)
+    check_between(0.5, 5.0)
+    check_nearest(1.0, 10)
+    business_logic.delete_components([ring.id])
+    check_between(0.5, 5.0)
+    check_nearest(2.0, 5)
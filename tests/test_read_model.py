@@ -0,0 +1,182 @@
+"""The in-memory read model must answer exactly like the SQLite queries it stands in for."""
+
+import random
+
+import pytest
+
+import business_logic
+import database_manager
+from read_model import ReadModel
+
+
+def component_row(id, type="Cassette", teeth=(11, 13, 15), name=None):
+    return {"id": id, "name": name or id, "type": type, "speed": None, "teeth": list(teeth),
+            "teeth_min": min(teeth), "teeth_max": max(teeth), "teeth_count": len(teeth), "comments": None}
+
+
+def configuration_row(id, front, rear, total_range=None):
+    return {"id": id, "name": id, "front_component_id": front, "rear_component_id": rear,
+            "comments": None, "total_range": total_range, "created_at": None}
+
+
+@pytest.fixture
+def model():
+    model = ReadModel()
+    components = [component_row("c1", "Chainring", (50, 34)), component_row("c2"), component_row("c3", "Chainring", (40,))]
+    configurations = [configuration_row("g1", "c1", "c2"), configuration_row("g2", "c3", "c2", 300), configuration_row("g3", "c1", "c1")]
+    model.ensure_loaded(lambda: (components, configurations))
+    return model
+
+
+def ids(items):
+    return [item.id for item in items]
+
+
+def test_writes_before_loading_are_ignored():
+    model = ReadModel()
+    model.put_components([component_row("c1")])
+    model.put_configuration(configuration_row("g1", "c1", "c1"))
+    assert model.stats() == {"loaded": False, "components": 0, "configurations": 0}
+
+
+def test_put_and_update_components(model):
+    model.put_components([component_row("c4", "Chainring", (36,))])
+    assert ids(model.get_components("Chainring")) == ["c1", "c3", "c4"]
+    model.update_component("c2", {"name": "Renamed", "teeth": [11, 28]})
+    component = model.get_component("c2")
+    assert (component.name, component.teeth) == ("Renamed", [11, 28])
+    # Configurations see the updated component
+    assert model.get_configuration("g1").rear_component_id.name == "Renamed"
+    model.update_component("missing", {"name": "x"})
+    assert model.get_component("missing") is None
+
+
+def test_type_change_keeps_table_order(model):
+    model.update_component("c1", {"type": "Cassette"})
+    assert ids(model.get_components("Chainring")) == ["c3"]
+    assert ids(model.get_components("Cassette")) == ["c1", "c2"]
+    model.update_component("c1", {"type": "Chainring"})
+    assert ids(model.get_components("Chainring")) == ["c1", "c3"]
+    assert ids(model.get_components()) == ["c1", "c2", "c3"]
+
+
+def test_delete_components_cascades_to_configurations(model):
+    model.delete_components(["c1"])
+    assert model.get_component("c1") is None
+    assert ids(model.get_components("Chainring")) == ["c3"]
+    assert ids(model.get_configurations()) == ["g2"]
+    assert model.get_configurations_with_components(component_id="c1") == []
+    model.delete_components(["c2", "missing"])
+    assert model.get_configurations() == []
+    assert model.stats() == {"loaded": True, "components": 1, "configurations": 0}
+
+
+def test_update_configurations_moves_usage(model):
+    model.update_configurations({"g1": {"rear_component_id": "c3", "total_range": 150}, "missing": {"name": "x"}})
+    assert ids(model.get_configurations_with_components(component_id="c2")) == ["g2"]
+    assert sorted(ids(model.get_configurations_with_components(component_id="c3"))) == ["g1", "g2"]
+    assert ids(model.get_configurations_with_components(missing_total_range=True)) == ["g3"]
+    model.delete_configurations(["g1", "missing"])
+    assert ids(model.get_configurations_with_components(component_id="c3")) == ["g2"]
+
+
+def test_delete_orphaned_configurations(model):
+    model.put_configuration(configuration_row("g4", "c1", "gone"))
+    assert ids(model.get_configurations_with_components()) == ["g1", "g2", "g3"]
+    assert model.get_configuration("g4").__data__["rear_component_id"] == "gone"
+    model.delete_orphaned_configurations()
+    assert model.get_configuration("g4") is None
+    assert ids(model.get_configurations()) == ["g1", "g2", "g3"]
+
+
+def test_reads_return_copies(model):
+    component = model.get_component("c1")
+    component.name = "Changed"
+    component.teeth.append(22)
+    assert model.get_component("c1").name == "c1"
+    assert model.get_component("c1").teeth == [50, 34]
+
+
+# Against SQLite: the same reads with and without the model after a random series of writes
+
+def component_key(comp):
+    return (comp.id, comp.name, comp.type, comp.speed, list(comp.teeth), comp.teeth_min, comp.teeth_max,
+            comp.teeth_count, comp.comments)
+
+
+def configuration_key(config):
+    return (config.id, config.name, config.__data__["front_component_id"], config.__data__["rear_component_id"],
+            config.comments, config.total_range, config.created_at)
+
+
+def attached_key(config):
+    """configuration_key plus the components attached to it (loaded with the configuration, no extra query)."""
+    return configuration_key(config) + (component_key(config.front_component_id), component_key(config.rear_component_id))
+
+
+def read_everything(component_ids, configuration_ids):
+    def attached(items):
+        return sorted(map(attached_key, items))
+
+    return {
+        "components": sorted(map(component_key, database_manager.get_components())),
+        "chainrings": [component_key(c) for c in database_manager.get_components("Chainring")],
+        "cassettes": [component_key(c) for c in database_manager.get_components("Cassette")],
+        "configurations": sorted(map(configuration_key, database_manager.get_configurations())),
+        "with_components": attached(database_manager.get_configurations_with_components()),
+        "missing_range": attached(database_manager.get_configurations_with_components(missing_total_range=True)),
+        "by_ids": attached(database_manager.get_configurations_with_components(ids=configuration_ids)),
+        "component": [c and component_key(c) for c in map(database_manager.get_component, component_ids)],
+        "configuration": [g and configuration_key(g) for g in map(database_manager.get_configuration, configuration_ids)],
+        "using": [attached(database_manager.get_configurations_with_components(component_id=i)) for i in component_ids],
+    }
+
+
+def test_matches_sqlite_after_random_writes(database, monkeypatch):
+    model = ReadModel()
+    rng = random.Random(5)
+
+    def check():
+        component_ids = [c.id for c in database_manager.get_components()]
+        configuration_ids = [g.id for g in database_manager.get_configurations()]
+        probe_components = rng.sample(component_ids, min(3, len(component_ids))) + ["missing"]
+        probe_configurations = rng.sample(configuration_ids, min(3, len(configuration_ids))) + ["missing"]
+        monkeypatch.setattr(database_manager, "_read_model", None)
+        expected = read_everything(probe_components, probe_configurations)
+        monkeypatch.setattr(database_manager, "_read_model", model)
+        assert read_everything(probe_components, probe_configurations) == expected
+
+    check()
+    assert model.loaded
+    for step in range(120):
+        component_ids = [c.id for c in database_manager.get_components()]
+        configuration_ids = [g.id for g in database_manager.get_configurations()]
+        op = rng.randrange(9)
+        if op == 0:
+            database_manager.add_component(f"New {step}", rng.choice(["Chainring", "Cassette"]),
+                                           [rng.randint(10, 50) for _ in range(3)], 3, "")
+        elif op == 1 and component_ids:
+            database_manager.update_component(rng.choice(component_ids), f"Updated {step}",
+                                              rng.choice(["Chainring", "Cassette"]), [11, 12], 2, "changed")
+        elif op == 2 and component_ids:
+            database_manager.delete_components(rng.sample(component_ids, min(rng.randint(1, 3), len(component_ids))))
+        elif op == 3:
+            database_manager.add_components_bulk([{"name": f"Bulk {step}", "type": "Cassette", "teeth": [11, 13, 15]}])
+        elif op in (4, 5) and len(component_ids) > 1:
+            database_manager.add_configuration(f"Config {step}", *rng.sample(component_ids, 2), "",
+                                               None if rng.random() < 0.5 else 300)
+        elif op == 6 and configuration_ids and component_ids:
+            database_manager.update_configuration(rng.choice(configuration_ids), f"Updated {step}",
+                                                  rng.choice(component_ids), rng.choice(component_ids), "z", None)
+        elif op == 7 and configuration_ids:
+            database_manager.delete_configuration(rng.choice(configuration_ids))
+        elif op == 8:
+            business_logic.refresh_configuration_ranges(only_missing=True)
+            database_manager.cleanup_orphaned_configurations()
+        check()
+
+    # A write inside a transaction drops the model, which then reloads
+    with database_manager.db.atomic():
+        database_manager.add_component("In transaction", "Cassette", [11])
+    assert not model.loaded
+    check()
@@ -1,5 +1,8 @@
 # Any helper methods goes here
 
+import base64
+import hashlib
+import json
 import uuid
 
 def generate_uuid():
@@ -26,4 +29,71 @@ def empty_to_none(value):
         return None
     if isinstance(value, str) and not value.strip():
         return None
-    return value
\ No newline at end of file
+    return value
+
+def make_etag(*parts):
+    """Build a strong HTTP ETag from the values a response depends on.
+
+    Args:
+        *parts: Values that fully determine the response (IDs, data versions, ...)
+
+    Returns:
+        str: Quoted ETag, e.g. '"3f2a..."'
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+def etag_matches(if_none_match, etag, match_any=True):
+    """Check an If-None-Match header value against an ETag.
+
+    Args:
+        if_none_match: Raw header value, possibly a comma-separated list, weak tags or "*"
+        etag: Quoted ETag of the current representation
+        match_any: Whether "*" matches. "*" matches any current representation (RFC 9110),
+            so pass False while it is not yet known that the resource exists
+
+    Returns:
+        bool: True if the client's cached copy is still current
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag or (match_any and candidate == "*"):
+            return True
+    return False
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row on a page as an opaque URL-safe cursor.
+
+    Args:
+        *values: JSON-serializable values, typically (sort name, sort value, id)
+
+    Returns:
+        str: Cursor to pass back as the "after" parameter for the next page
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Decode a cursor created by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a request
+
+    Returns:
+        list: The encoded values
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid page cursor.")
+    if not isinstance(values, list):
+        raise ValueError("Invalid page cursor.")
+    return values